@@ -0,0 +1,66 @@
+import argparse
+import time
+from typing import Callable
+
+import numpy as np
+
+from gfs.sample.algebra import _all_pairs, _intersect_pairs
+from gfs.sample.index import IntervalIndex
+from gfs.sample.leaf import LeafList
+
+
+def random_leaves(
+    rng: np.random.Generator, n_leaves: int, n_axes: int, bit_depth: int
+) -> LeafList:
+    side_bit_depths = rng.integers(0, bit_depth, size=(n_leaves, n_axes))
+    n_positions = 1 << (bit_depth - side_bit_depths)
+    endpoints = rng.integers(0, n_positions) << side_bit_depths
+    multiplicity = rng.integers(0, 4, size=n_leaves)
+    return LeafList.from_arrays(multiplicity, endpoints, side_bit_depths)
+
+
+def brute_force(left: LeafList, right: LeafList) -> LeafList:
+    return _intersect_pairs(left, right, *_all_pairs(left, right))
+
+
+def indexed(left: LeafList, right: LeafList) -> LeafList:
+    index_right, index_left = IntervalIndex(left).overlapping(right)
+    return _intersect_pairs(left, right, index_left, index_right)
+
+
+def best_time(func: Callable[[], object], repeat: int) -> float:
+    timings: list[float] = list()
+    for _ in range(0, repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare brute-force and indexed leaf intersection in multiply."
+    )
+    parser.add_argument("--bit_depth", type=int, default=16)
+    parser.add_argument("--n_axes", type=int, default=1)
+    parser.add_argument("--n_right", type=int, default=31)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    right = random_leaves(rng, args.n_right, args.n_axes, args.bit_depth)
+    print("n_left,n_right,n_pairs,n_overlapping,brute_force_ms,indexed_ms,speedup")
+    for n_left in [2**k for k in range(2, 18)]:
+        left = random_leaves(rng, n_left, args.n_axes, args.bit_depth)
+        n_overlapping = len(indexed(left, right))
+        t_brute = best_time(lambda: brute_force(left, right), args.repeat)
+        t_indexed = best_time(lambda: indexed(left, right), args.repeat)
+        print(
+            f"{n_left},{args.n_right},{n_left * args.n_right},{n_overlapping},"
+            f"{t_brute * 1000:.3f},{t_indexed * 1000:.3f},{t_brute / t_indexed:.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
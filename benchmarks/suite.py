@@ -0,0 +1,309 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from itertools import product
+from typing import Any, Callable, NamedTuple
+
+import numpy as np
+
+from gfs.app.bayes import predict_batch
+from gfs.app.elements import ParameterSampleArray
+from gfs.app.io import export_leaves, load_leaves
+from gfs.constants import LEAF_BIT_DEPTH_RANGE
+from gfs.models.binomial import BinomialModel
+from gfs.sample.algebra import (
+    _intersect_leaves,
+    _intersect_pairs,
+    _overlapping_pairs,
+    multiply,
+    multiply_powers,
+)
+from gfs.sample.functions import constant, linear
+from gfs.sample.leaf import LeafList, combine_on_multiplicity
+from gfs.sample.prune import FixedRange, MassBudget
+from gfs.sample.qmc import make_points
+from gfs.sample.tree import Tree
+
+RESULTS_VERSION = 1
+
+N_SAMPLES = 100_000
+
+N_SCALAR_LEAVES = 16
+
+PRUNING_EPSILON = 1e-6
+
+
+class Fixture(NamedTuple):
+    bit_depth: int
+    n_axes: int
+    n_data_points: int
+    likelihood: LeafList
+    posterior: LeafList
+    directory: str
+
+
+def likelihood_leaves(
+    bit_depth: int, n_axes: int, axis: int, reverse: bool
+) -> LeafList:
+    leaves = linear(domain_bit_depth=bit_depth, reverse=reverse)
+    for other_axis in range(0, n_axes):
+        if other_axis != axis:
+            leaves.extend_domain(bit_depth=bit_depth, axis=other_axis)
+    return leaves
+
+
+def make_fixture(
+    seed: int, bit_depth: int, n_axes: int, n_data_points: int, directory: str
+) -> Fixture:
+    rng = np.random.default_rng([seed, bit_depth, n_axes, n_data_points])
+    axes = rng.integers(0, n_axes, size=n_data_points)
+    reverse = rng.integers(0, 2, size=n_data_points)
+    keys, counts = np.unique(
+        np.column_stack([axes, reverse]), axis=0, return_counts=True
+    )
+    factors = [
+        (likelihood_leaves(bit_depth, n_axes, axis, bool(rev)), count)
+        for (axis, rev), count in zip(keys.tolist(), counts.tolist())
+    ]
+    posterior = multiply(
+        multiply_powers(factors, FixedRange()),
+        constant(domain_bit_depths=[bit_depth] * n_axes),
+        FixedRange(),
+    )
+    return Fixture(
+        bit_depth=bit_depth,
+        n_axes=n_axes,
+        n_data_points=n_data_points,
+        likelihood=factors[0][0],
+        posterior=posterior,
+        directory=directory,
+    )
+
+
+def case_multiply(fixture: Fixture) -> Callable[[], object]:
+    return lambda: multiply(fixture.likelihood, fixture.posterior, FixedRange())
+
+
+def case_intersect_leaves(fixture: Fixture) -> Callable[[], object]:
+    left = list(fixture.posterior)[:N_SCALAR_LEAVES]
+    right = list(fixture.likelihood)
+    return lambda: [_intersect_leaves(l1, l2) for l1 in left for l2 in right]
+
+
+def case_combine_on_multiplicity(fixture: Fixture) -> Callable[[], object]:
+    pairs = _overlapping_pairs(fixture.likelihood, fixture.posterior)
+    leaves = _intersect_pairs(fixture.likelihood, fixture.posterior, *pairs)
+    return lambda: combine_on_multiplicity(leaves)
+
+
+def case_drop_small(fixture: Fixture) -> Callable[[], object]:
+    bit_depth = int(fixture.posterior.bit_depth.max()) - LEAF_BIT_DEPTH_RANGE // 2
+    return lambda: LeafList(fixture.posterior).drop_small(bit_depth=bit_depth)
+
+
+def case_prune_mass_budget(fixture: Fixture) -> Callable[[], object]:
+    return lambda: MassBudget(PRUNING_EPSILON).prune(fixture.posterior)
+
+
+def case_tree_init(fixture: Fixture) -> Callable[[], object]:
+    return lambda: Tree(leaves=fixture.posterior)
+
+
+def case_tree_label_leaves(fixture: Fixture) -> Callable[[], object]:
+    tree = Tree(leaves=fixture.posterior)
+    return lambda: tree._label_leaves(tree.leaves)
+
+
+def case_tree_sample(fixture: Fixture) -> Callable[[], object]:
+    tree = Tree(leaves=fixture.posterior)
+    rng = np.random.default_rng(0)
+    return lambda: tree.sample(n_samples=N_SAMPLES, rng=rng)
+
+
+def case_tree_sample_sobol(fixture: Fixture) -> Callable[[], object]:
+    tree = Tree(leaves=fixture.posterior)
+    points = make_points("sobol", 1 + fixture.n_axes, np.random.default_rng(0))
+    return lambda: tree.sample(n_samples=N_SAMPLES, points=points)
+
+
+def _leaves_filepath(fixture: Fixture, extension: str) -> str:
+    return os.path.join(
+        fixture.directory,
+        f"leaves_{fixture.bit_depth}_{fixture.n_axes}_{fixture.n_data_points}"
+        f"{extension}",
+    )
+
+
+def case_export_leaves_json(fixture: Fixture) -> Callable[[], object]:
+    filepath = _leaves_filepath(fixture, ".json")
+    return lambda: export_leaves(fixture.posterior, filepath)
+
+
+def case_export_leaves_binary(fixture: Fixture) -> Callable[[], object]:
+    filepath = _leaves_filepath(fixture, ".leaves")
+    return lambda: export_leaves(fixture.posterior, filepath)
+
+
+def case_load_leaves_json(fixture: Fixture) -> Callable[[], object]:
+    filepath = _leaves_filepath(fixture, ".json")
+    export_leaves(fixture.posterior, filepath)
+    return lambda: load_leaves(filepath)
+
+
+def case_load_leaves_binary(fixture: Fixture) -> Callable[[], object]:
+    filepath = _leaves_filepath(fixture, ".leaves")
+    export_leaves(fixture.posterior, filepath)
+    return lambda: np.asarray(load_leaves(filepath).endpoints).sum()
+
+
+def case_predict(fixture: Fixture) -> Callable[[], object]:
+    model = BinomialModel(bit_depth=fixture.bit_depth)
+    coordinates = Tree(leaves=fixture.posterior).sample(
+        n_samples=N_SAMPLES, rng=np.random.default_rng(0)
+    )
+    samples = ParameterSampleArray(coordinates[:, :1], model.param_domain)
+    xs = [None] * fixture.n_data_points
+    return lambda: predict_batch(model, samples, xs)
+
+
+CASES: dict[str, Callable[[Fixture], Callable[[], object]]] = {
+    "multiply": case_multiply,
+    "intersect_leaves": case_intersect_leaves,
+    "combine_on_multiplicity": case_combine_on_multiplicity,
+    "drop_small": case_drop_small,
+    "prune_mass_budget": case_prune_mass_budget,
+    "tree_init": case_tree_init,
+    "tree_label_leaves": case_tree_label_leaves,
+    "tree_sample": case_tree_sample,
+    "tree_sample_sobol": case_tree_sample_sobol,
+    "export_leaves_json": case_export_leaves_json,
+    "export_leaves_binary": case_export_leaves_binary,
+    "load_leaves_json": case_load_leaves_json,
+    "load_leaves_binary": case_load_leaves_binary,
+    "predict": case_predict,
+}
+
+
+def best_time(func: Callable[[], object], repeat: int) -> float:
+    timings: list[float] = list()
+    for _ in range(0, repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run(args: argparse.Namespace) -> None:
+    results: list[dict[str, Any]] = list()
+    with tempfile.TemporaryDirectory() as directory:
+        for bit_depth, n_axes, n_data_points in product(
+            args.bit_depths, args.n_axes, args.n_data_points
+        ):
+            fixture = make_fixture(
+                args.seed, bit_depth, n_axes, n_data_points, directory
+            )
+            params = {
+                "bit_depth": bit_depth,
+                "n_axes": n_axes,
+                "n_data_points": n_data_points,
+            }
+            for name in args.cases:
+                seconds = best_time(CASES[name](fixture), args.repeat)
+                results.append(
+                    {
+                        "case": name,
+                        "params": params,
+                        "n_leaves": len(fixture.posterior),
+                        "seconds": seconds,
+                    }
+                )
+                print(
+                    f"{name:<24} bit_depth={bit_depth:<3} n_axes={n_axes:<2} "
+                    f"n_data_points={n_data_points:<6} n_leaves="
+                    f"{len(fixture.posterior):<8} {seconds * 1000:10.3f} ms",
+                    flush=True,
+                )
+
+    output = {
+        "version": RESULTS_VERSION,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "repeat": args.repeat,
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(output, f, indent=2)
+    print(f"Saved results: {args.output}")
+
+
+def _result_key(result: dict[str, Any]) -> str:
+    return json.dumps([result["case"], result["params"]], sort_keys=True)
+
+
+def compare(args: argparse.Namespace) -> int:
+    with open(args.baseline) as f:
+        baseline = {_result_key(r): r for r in json.load(f)["results"]}
+    with open(args.results) as f:
+        results = json.load(f)["results"]
+
+    regressions = 0
+    print("case,bit_depth,n_axes,n_data_points,baseline_ms,ms,ratio,status")
+    for result in results:
+        base = baseline.get(_result_key(result))
+        if base is None:
+            continue
+        ratio = result["seconds"] / base["seconds"]
+        regressed = all(
+            [
+                ratio > 1 + args.threshold,
+                result["seconds"] - base["seconds"] > args.min_seconds,
+            ]
+        )
+        regressions += regressed
+        params = result["params"]
+        print(
+            f"{result['case']},{params['bit_depth']},{params['n_axes']},"
+            f"{params['n_data_points']},{base['seconds'] * 1000:.3f},"
+            f"{result['seconds'] * 1000:.3f},{ratio:.2f},"
+            f"{'REGRESSION' if regressed else 'ok'}"
+        )
+    print(f"{regressions} regression(s) beyond {args.threshold:.0%}")
+    return 1 if regressions > 0 else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Time the sampling core and compare runs against a baseline."
+    )
+    subparsers = parser.add_subparsers(required=True)
+
+    run_parser = subparsers.add_parser("run")
+    run_parser.add_argument("--output", default="benchmark_results.json")
+    run_parser.add_argument("--bit_depths", nargs="*", type=int, default=[5, 8, 12])
+    run_parser.add_argument("--n_axes", nargs="*", type=int, default=[1, 2])
+    run_parser.add_argument("--n_data_points", nargs="*", type=int, default=[50, 500])
+    run_parser.add_argument(
+        "--cases", nargs="*", choices=list(CASES), default=list(CASES)
+    )
+    run_parser.add_argument("--repeat", type=int, default=5)
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.set_defaults(func=run)
+
+    compare_parser = subparsers.add_parser("compare")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("results")
+    compare_parser.add_argument("--threshold", type=float, default=0.2)
+    compare_parser.add_argument("--min_seconds", type=float, default=5e-4)
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args) or 0)
+
+
+if __name__ == "__main__":
+    main()
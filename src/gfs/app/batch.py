@@ -0,0 +1,155 @@
+import logging
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from typing import Callable, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+
+class BatchTask(NamedTuple):
+    config: str
+    command: str
+    inputs: tuple[str, ...]
+    output: str | None
+
+
+class BatchResult(NamedTuple):
+    config: str
+    command: str
+    status: str
+    seconds: float
+    shared_with: str | None
+    error: str | None
+
+
+def _timed_run(run: Callable[[str, str], None], config: str, command: str) -> float:
+    start = time.perf_counter()
+    run(config, command)
+    return time.perf_counter() - start
+
+
+def _ready_tasks(tasks: list[BatchTask]) -> list[BatchTask]:
+    pending_outputs = {task.output for task in tasks if task.output is not None}
+    return [
+        task
+        for task in tasks
+        if not any(filepath in pending_outputs for filepath in task.inputs)
+    ]
+
+
+def _group_by_key(
+    tasks: list[BatchTask], key: Callable[[BatchTask], str | None]
+) -> tuple[list[list[BatchTask]], list[BatchResult]]:
+    groups: dict[str, list[BatchTask]] = dict()
+    failed: list[BatchResult] = list()
+    for task in tasks:
+        try:
+            task_key = key(task)
+        except Exception as error:
+            failed.append(
+                BatchResult(task.config, task.command, "failed", 0.0, None, str(error))
+            )
+            continue
+        groups.setdefault(task_key or task.config, list()).append(task)
+    return list(groups.values()), failed
+
+
+def _run_groups(
+    groups: list[list[BatchTask]],
+    run: Callable[[str, str], None],
+    executor: ProcessPoolExecutor,
+) -> list[BatchResult]:
+    # The first task of a group does the work; the others start once it is done,
+    # and find its output in the shared cache.
+    futures: dict[Future, tuple[BatchTask, BatchTask, list[BatchTask]]] = {
+        executor.submit(_timed_run, run, group[0].config, group[0].command): (
+            group[0],
+            group[0],
+            group[1:],
+        )
+        for group in groups
+    }
+    results: list[BatchResult] = list()
+    while len(futures) > 0:
+        future = next(as_completed(futures))
+        task, lead, followers = futures.pop(future)
+        shared_with = lead.config if task is not lead else None
+        try:
+            seconds = future.result()
+        except Exception as error:
+            logger.error(f"{task.command} failed for {task.config}: {error}")
+            results.append(
+                BatchResult(
+                    task.config, task.command, "failed", 0.0, shared_with, str(error)
+                )
+            )
+            for follower in followers:
+                results.append(
+                    BatchResult(
+                        follower.config,
+                        follower.command,
+                        "skipped",
+                        0.0,
+                        lead.config,
+                        f"{lead.config} failed",
+                    )
+                )
+            continue
+
+        status = "ok" if shared_with is None else "shared"
+        results.append(
+            BatchResult(task.config, task.command, status, seconds, shared_with, None)
+        )
+        logger.info(f"{task.command} {status} for {task.config} in {seconds:.2f}s")
+        for follower in followers:
+            follower_future = executor.submit(
+                _timed_run, run, follower.config, follower.command
+            )
+            futures[follower_future] = (follower, lead, list())
+    return results
+
+
+def run_batch(
+    configs: list[str],
+    commands: list[str],
+    jobs: int,
+    describe: Callable[[str, str], BatchTask],
+    key: Callable[[BatchTask], str | None],
+    run: Callable[[str, str], None],
+) -> list[BatchResult]:
+    results: list[BatchResult] = list()
+    failed_configs: set[str] = set()
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        for command in commands:
+            remaining: list[BatchTask] = list()
+            for config in configs:
+                if config in failed_configs:
+                    results.append(
+                        BatchResult(
+                            config, command, "skipped", 0.0, None, "earlier stage"
+                        )
+                    )
+                    continue
+                remaining.append(describe(config, command))
+
+            # Tasks reading a file that another task of this stage writes, such as
+            # a prior that is another project's posterior, wait for that task.
+            while len(remaining) > 0:
+                ready = _ready_tasks(remaining)
+                if len(ready) == 0:
+                    ready = remaining
+                    logger.warning(f"Circular inputs between {command} tasks")
+                remaining = [task for task in remaining if task not in ready]
+                groups, stage_results = _group_by_key(ready, key)
+                logger.info(
+                    f"Running {command}: {len(ready)} project(s), "
+                    f"{len(groups)} distinct"
+                )
+                stage_results += _run_groups(groups, run, executor)
+                failed_configs |= {
+                    result.config
+                    for result in stage_results
+                    if result.status != "ok" and result.status != "shared"
+                }
+                results += stage_results
+    return results
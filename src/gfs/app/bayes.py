@@ -1,22 +1,45 @@
 import logging
 from abc import ABC, abstractmethod
+from concurrent.futures import Executor, ProcessPoolExecutor
 from dataclasses import dataclass
+from itertools import repeat
+from typing import Callable, Iterator
+
+import numpy as np
 
 from gfs.app.domain import Domain
 from gfs.app.elements import (
     DataPoint,
     Distribution,
+    ExactHistogram,
+    Marginal,
     Parameter,
+    ParameterSampleArray,
     ParameterSamples,
     PredictiveDists,
+    WeightedParameterSamples,
     XDataPoint,
 )
-from gfs.sample.algebra import multiply
-from gfs.sample.leaf import LeafList
+from gfs.constants import PREDICT_CHUNK_SIZE, QUANTILES, SAMPLES_CHUNK_SIZE
+from gfs.metrics import timed
+from gfs.sample.algebra import multiply, multiply_powers
+from gfs.sample.leaf import LeafList, Side
+from gfs.sample.marginals import (
+    bin_edges,
+    bin_mass,
+    leaf_probabilities,
+    marginal_mass,
+    moments,
+    quantiles,
+)
+from gfs.sample.prune import Pruning
+from gfs.sample.qmc import make_points
 from gfs.sample.tree import Tree
 
 logger = logging.getLogger(__name__)
 
+PARALLEL_CHUNK_SEED = 0
+
 
 class Prior(LeafList):
     pass
@@ -46,40 +69,326 @@ class Model(ABC):
     def dist(self, param: Parameter, x: XDataPoint | None) -> Distribution:
         pass
 
+    def dist_batch(self, params: np.ndarray, xs: list[XDataPoint | None]) -> np.ndarray:
+        dists = [
+            [self.dist(Parameter(param), x) for param in params.tolist()] for x in xs
+        ]
+        return np.array(dists, dtype=float).reshape(
+            len(xs), len(params), len(self.categories)
+        )
+
+    def expected_dist_over_box(
+        self, sides: list[Side], x: XDataPoint | None
+    ) -> Distribution:
+        raise NotImplementedError(
+            f"{self.__class__.__name__} does not support exact prediction."
+        )
+
+    def expected_dist_over_boxes(
+        self, leaves: LeafList, xs: list[XDataPoint | None]
+    ) -> np.ndarray:
+        dists = [
+            [self.expected_dist_over_box(leaf.sides, x) for leaf in leaves] for x in xs
+        ]
+        return np.array(dists, dtype=float).reshape(
+            len(xs), len(leaves), len(self.categories)
+        )
+
+
+def _likelihood_product(
+    likelihood: Likelihood, data: list[DataPoint], pruning: Pruning, prior: Prior
+) -> LeafList | None:
+    data_counts: dict[tuple, tuple[DataPoint, int]] = dict()
+    for datum in data:
+        key = (datum.x, datum.y)
+        first_datum, count = data_counts.get(key, (datum, 0))
+        data_counts[key] = (first_datum, count + 1)
+
+    if len(data_counts) == 0:
+        return None
+
+    factors: list[tuple[LeafList, int]] = list()
+    for datum, count in data_counts.values():
+        logger.info(f"Updating prior with datum: {datum}, count={count}")
+        factors.append((likelihood.leaves(datum=datum), count))
+    return multiply_powers(factors, pruning, reference=prior)
+
+
+def _likelihood_product_task(
+    likelihood: Likelihood, data: list[DataPoint], pruning: Pruning, prior: Prior
+) -> tuple[LeafList | None, Pruning]:
+    # Each task prunes with its own copy of the policy, so it returns the counts
+    # for the parent to merge.
+    pruning.reset()
+    return _likelihood_product(likelihood, data, pruning, prior), pruning
+
+
+def _multiply_task(
+    leaves_left: LeafList, leaves_right: LeafList, pruning: Pruning, prior: Prior
+) -> tuple[LeafList, Pruning]:
+    pruning.reset()
+    return multiply(leaves_left, leaves_right, pruning, prior), pruning
+
+
+def _reduce_in_pool(
+    leaf_lists: list[LeafList], pruning: Pruning, prior: Prior, executor: Executor
+) -> LeafList:
+    while len(leaf_lists) > 1:
+        products = executor.map(
+            _multiply_task,
+            leaf_lists[0:-1:2],
+            leaf_lists[1::2],
+            repeat(pruning),
+            repeat(prior),
+        )
+        leftover = leaf_lists[-1:] if len(leaf_lists) % 2 else []
+        reduced: list[LeafList] = list()
+        for leaves, task_pruning in products:
+            pruning.merge(task_pruning)
+            reduced.append(leaves)
+        leaf_lists = reduced + leftover
+        logger.debug(f"Reduced likelihood products: {len(leaf_lists)} remaining")
+    return leaf_lists[0]
+
+
+def _parallel_likelihood_product(
+    likelihood: Likelihood,
+    data: list[DataPoint],
+    pruning: Pruning,
+    prior: Prior,
+    workers: int,
+) -> LeafList | None:
+    # Chunks are random subsets rather than runs of the data, so that each partial
+    # product has about the shape of the whole. Runs of ordered data can have
+    # partial products that are pruned to disjoint supports.
+    order = np.random.default_rng(PARALLEL_CHUNK_SEED).permutation(len(data))
+    chunks = [[data[i] for i in order[k::workers]] for k in range(0, workers)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunk_products = executor.map(
+            _likelihood_product_task,
+            repeat(likelihood),
+            chunks,
+            repeat(pruning),
+            repeat(prior),
+        )
+        leaf_lists: list[LeafList] = list()
+        for leaves, task_pruning in chunk_products:
+            pruning.merge(task_pruning)
+            if leaves is not None:
+                leaf_lists.append(leaves)
+        if len(leaf_lists) == 0:
+            return None
+        return _reduce_in_pool(leaf_lists, pruning, prior, executor)
+
 
+@timed("update_prior")
 def update_prior(
     prior: Prior,
     likelihood: Likelihood,
     data: list[DataPoint],
-    leaf_bit_depth_range: int,
+    pruning: Pruning,
+    workers: int = 1,
 ) -> Posterior:
-    leaves = prior
-    for datum in data:
-        logger.info(f"Updating prior with datum: {datum}")
-        leaves = multiply(likelihood.leaves(datum=datum), leaves, leaf_bit_depth_range)
-        logger.debug(f"Number of leaves: {len(leaves)}")
+    if workers > 1 and len(data) > 1:
+        likelihood_leaves = _parallel_likelihood_product(
+            likelihood, data, pruning, prior, workers
+        )
+    else:
+        likelihood_leaves = _likelihood_product(likelihood, data, pruning, prior)
+
+    if likelihood_leaves is None:
+        return Posterior(prior)
+    leaves = multiply(likelihood_leaves, prior, pruning)
+    if len(leaves) == 0:
+        raise ValueError(
+            f"Pruning with {pruning} left no leaves in the posterior. "
+            "Use a looser pruning policy."
+        )
+    logger.debug(f"Number of leaves: {len(leaves)}")
     return Posterior(leaves)
 
 
 def predict(
-    model: Model, parameter_samples: ParameterSamples, x: XDataPoint | None
+    model: Model,
+    parameter_samples: (
+        ParameterSamples | ParameterSampleArray | WeightedParameterSamples
+    ),
+    x: XDataPoint | None,
 ) -> PredictiveDists:
     predictions = PredictiveDists()
     logger.info(f"Predicting: model={model.__class__.__name__}, x={x}")
-    for parameter in parameter_samples:
-        predictions.append(model.dist(parameter, x))
+    if isinstance(parameter_samples, WeightedParameterSamples):
+        for parameter, count in parameter_samples.items():
+            predictions.append_weighted(model.dist(parameter, x), count)
+    else:
+        for parameter in parameter_samples:
+            predictions.append(model.dist(parameter, x))
     logger.info(f"Average predictive distribution: {predictions.mean}")
     return predictions
 
 
+def _average_dists(
+    dist_batch: Callable[[list[XDataPoint | None]], np.ndarray],
+    probabilities: np.ndarray,
+    xs: list[XDataPoint | None],
+    n_categories: int,
+    chunk_size: int,
+) -> np.ndarray:
+    n_inputs_per_chunk = max(1, chunk_size // (len(probabilities) * n_categories))
+    means: list[np.ndarray] = [np.zeros((0, n_categories))]
+    for start in range(0, len(xs), n_inputs_per_chunk):
+        means.append(probabilities @ dist_batch(xs[start : start + n_inputs_per_chunk]))
+    predictions = np.concatenate(means)
+    if np.any(np.round(predictions.sum(axis=-1), 6) != 1):
+        raise ValueError("Distribution must sum to 1.")
+    return predictions
+
+
+@timed("predict")
+def predict_batch(
+    model: Model,
+    parameter_samples: (
+        ParameterSamples | ParameterSampleArray | WeightedParameterSamples
+    ),
+    xs: list[XDataPoint | None],
+    chunk_size: int = PREDICT_CHUNK_SIZE,
+) -> np.ndarray:
+    if not isinstance(parameter_samples, WeightedParameterSamples):
+        parameter_samples = parameter_samples.weighted
+    params, counts = parameter_samples.to_arrays()
+    if len(params) == 0:
+        raise ValueError("Cannot compute mean distribution of empty list.")
+    probabilities = counts / counts.sum()
+
+    logger.info(
+        f"Predicting: model={model.__class__.__name__}, n_inputs={len(xs)}, "
+        f"n_distinct_parameters={len(params)}"
+    )
+    return _average_dists(
+        lambda xs_chunk: model.dist_batch(params, xs_chunk),
+        probabilities,
+        xs,
+        len(model.categories),
+        chunk_size,
+    )
+
+
+@timed("predict")
+def predict_exact(
+    model: Model,
+    posterior: Posterior,
+    xs: list[XDataPoint | None],
+    chunk_size: int = PREDICT_CHUNK_SIZE,
+) -> np.ndarray:
+    if len(posterior) == 0:
+        raise ValueError("Cannot compute mean distribution of empty list.")
+    logger.info(
+        f"Predicting exactly: model={model.__class__.__name__}, n_inputs={len(xs)}, "
+        f"n_leaves={len(posterior)}"
+    )
+    return _average_dists(
+        lambda xs_chunk: model.expected_dist_over_boxes(posterior, xs_chunk),
+        leaf_probabilities(posterior),
+        xs,
+        len(model.categories),
+        chunk_size,
+    )
+
+
+def sample_coordinates(
+    posterior: Posterior | Tree,
+    n_posterior_samples: int,
+    chunk_size: int = SAMPLES_CHUNK_SIZE,
+    strategy: str = "iid",
+    seed: int | None = None,
+) -> Iterator[np.ndarray]:
+    logger.info(
+        f"Sampling posterior: n_posterior_samples={n_posterior_samples}, "
+        f"strategy={strategy}, seed={seed}"
+    )
+    tree = posterior if isinstance(posterior, Tree) else Tree(leaves=posterior)
+    logger.debug(f"Sampling posterior: n_leaves={len(tree.leaves)}")
+    points = make_points(
+        strategy, n_dims=1 + tree.leaves.n_axes, rng=np.random.default_rng(seed)
+    )
+    yield from tree.iter_samples(n_posterior_samples, chunk_size, points=points)
+
+
 def sample(
-    posterior: Posterior, domain: Domain, n_posterior_samples: int
+    posterior: Posterior,
+    domain: Domain,
+    n_posterior_samples: int,
+    seed: int | None = None,
 ) -> ParameterSamples:
-    logger.info(f"Sampling posterior: n_posterior_samples={n_posterior_samples}")
     samples = ParameterSamples()
-    tree = Tree(leaves=posterior)
-    logger.debug(f"Sampling posterior: tree.depth={tree.depth}")
-    logger.debug(f"Sampling posterior: tree.n_blocks={tree.n_blocks}")
-    for i in range(n_posterior_samples):
-        samples.append(Parameter(domain.scale(tree.sample_once())))
+    for chunk in sample_coordinates(posterior, n_posterior_samples, seed=seed):
+        for parameter in domain.scale_array(chunk).tolist():
+            samples.append(Parameter(parameter))
     return samples
+
+
+def sample_weighted(
+    posterior: Posterior,
+    domain: Domain,
+    n_posterior_samples: int,
+    seed: int | None = None,
+) -> WeightedParameterSamples:
+    chunks = sample_coordinates(posterior, n_posterior_samples, seed=seed)
+    return WeightedParameterSamples.from_coordinates(chunks, domain)
+
+
+def exact_histogram(
+    posterior: Posterior, domain: Domain, n_bins: int | None = None
+) -> ExactHistogram:
+    logger.info(f"Computing exact histogram: n_bins={n_bins}")
+    edges = [bin_edges(axis.bit_depth, n_bins) for axis in domain]
+    mass = bin_mass(posterior, edges)
+    nonzero = np.nonzero(mass)
+    coordinates = np.column_stack(
+        [axis_edges[index] for axis_edges, index in zip(edges, nonzero)]
+    )
+    hist = ExactHistogram()
+    parameters = domain.scale_array(coordinates).tolist()
+    for parameter, probability in zip(parameters, mass[nonzero].tolist()):
+        hist[Parameter(parameter)] = probability
+    return hist
+
+
+def marginals(
+    posterior: Posterior,
+    domain: Domain,
+    n_bins: int | None = None,
+    quantile_levels: tuple[float, ...] = QUANTILES,
+) -> list[Marginal]:
+    logger.info(f"Computing marginals: n_bins={n_bins}")
+    means, variances = moments(posterior)
+    results: list[Marginal] = list()
+    for i, axis in enumerate(domain):
+        scale = domain._get_scale(axis)
+        edges = bin_edges(axis.bit_depth, n_bins)
+        mass = marginal_mass(posterior, i, edges)
+        quantile_coordinates = quantiles(
+            posterior, i, list(quantile_levels), axis.bit_depth
+        )
+        marginal = Marginal(
+            axis=axis.name,
+            mean=axis.left_endpoint + scale * float(means[i]),
+            variance=scale**2 * float(variances[i]),
+            quantiles={
+                level: axis.left_endpoint + scale * coordinate
+                for level, coordinate in zip(
+                    quantile_levels, quantile_coordinates.tolist()
+                )
+            },
+            masses={
+                axis.left_endpoint + scale * edge: probability
+                for edge, probability in zip(edges[:-1].tolist(), mass.tolist())
+                if probability > 0
+            },
+        )
+        logger.info(
+            f"Marginal {marginal.axis}: mean={marginal.mean}, "
+            f"variance={marginal.variance}, quantiles={marginal.quantiles}"
+        )
+        results.append(marginal)
+    return results
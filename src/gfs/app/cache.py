@@ -0,0 +1,93 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+from typing import Any, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+DIGEST_CHUNK_SIZE = 1 << 20
+
+
+class DataSlice(NamedTuple):
+    digest: str
+    offset: int
+    n_data_points: int
+
+
+def file_digest(filepath: str) -> str:
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        while chunk := f.read(DIGEST_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def data_slice(data_file: str, n_data_points: int) -> DataSlice:
+    digest = hashlib.sha256()
+    offset = 0
+    count = 0
+    with open(data_file, "rb") as f:
+        for line in f:
+            if count == n_data_points:
+                break
+            digest.update(line)
+            offset += len(line)
+            count += 1
+    return DataSlice(digest=digest.hexdigest(), offset=offset, n_data_points=count)
+
+
+def cache_key(stage: str, **inputs: Any) -> str:
+    payload = json.dumps({"stage": stage, **inputs}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ArtifactCache:
+    def __init__(self, directory: str, max_bytes: int) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str, extension: str) -> str:
+        return os.path.join(self.directory, key + extension)
+
+    def restore(self, key: str, filepath: str) -> bool:
+        cached = self._path(key, os.path.splitext(filepath)[1])
+        try:
+            os.utime(cached)
+        except FileNotFoundError:
+            logger.info(f"Cache miss: {key}")
+            return False
+        directory = os.path.dirname(filepath)
+        if directory != "":
+            os.makedirs(directory, exist_ok=True)
+        shutil.copyfile(cached, filepath + ".tmp")
+        os.replace(filepath + ".tmp", filepath)
+        logger.info(f"Cache hit: {key} -> {filepath}")
+        return True
+
+    def store(self, key: str, filepath: str) -> None:
+        cached = self._path(key, os.path.splitext(filepath)[1])
+        shutil.copyfile(filepath, cached + ".tmp")
+        os.replace(cached + ".tmp", cached)
+        logger.info(f"Cached: {filepath} -> {key}")
+        self.evict()
+
+    def evict(self) -> None:
+        entries: list[tuple[float, int, str]] = list()
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total_bytes = sum([size for _, size, _ in entries])
+        for _, size, path in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_bytes -= size
+            logger.info(f"Evicted from cache: {path}")
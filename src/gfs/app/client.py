@@ -1,59 +1,328 @@
 import argparse
+import cProfile
+import inspect
 import logging
 import os
+import sys
+import time
+from functools import cache, partial
+from glob import glob
+from itertools import islice
+from tempfile import TemporaryDirectory
+from typing import Callable, Iterator, TypeVar
 
-from gfs.app.bayes import Likelihood, Posterior, Prior, predict, sample, update_prior
-from gfs.app.elements import DataPoint
+from gfs import metrics
+from gfs.app.batch import BatchTask, run_batch
+from gfs.app.bayes import (
+    Likelihood,
+    Model,
+    Posterior,
+    Prior,
+    exact_histogram,
+    marginals,
+    predict_batch,
+    predict_exact,
+    sample_coordinates,
+    update_prior,
+)
+from gfs.app.cache import ArtifactCache, DataSlice, cache_key, data_slice, file_digest
+from gfs.app.elements import DataPoint, UpdateProgress
 from gfs.app.io import (
+    LEAVES_FILE_EXTENSION,
+    convert_leaves,
+    export_batch_summary,
+    export_exact_histogram,
     export_histogram,
     export_leaves,
-    export_prediction,
-    export_samples,
+    export_marginals,
+    export_metrics,
+    export_predictions,
+    export_progress,
+    export_sample_chunks,
+    export_scale_report,
+    export_tree,
+    iter_data,
     load_data,
     load_leaves,
+    load_progress,
     load_project,
     load_samples,
+    load_tree,
+    progress_filepath,
+    tree_filepath,
 )
 from gfs.app.project import Project
-from gfs.constants import VERSION, get_logging_level
+from gfs.app.sampling import sample_coordinates_parallel
+from gfs.app.scale import growth_exponents, scale_report
+from gfs.constants import (
+    VERSION,
+    get_cache_dir,
+    get_logging_level,
+)
+from gfs.sample.leaf import LeafList, coarsen
+from gfs.sample.prune import PRUNING_POLICIES
+from gfs.sample.qmc import SAMPLING_STRATEGIES
+from gfs.sample.tree import Tree
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
 
-def cli_update_prior(project: Project) -> None:
-    data: list[DataPoint] = load_data(
-        data_file=project.training_data_file, preprocessor=project.io.preprocessor
+
+def _starting_progress(project: Project) -> UpdateProgress | None:
+    if not project.params.resume:
+        return None
+    for filepath in [project.posterior_file, project.prior_file]:
+        if filepath is None:
+            continue
+        progress = load_progress(progress_filepath(filepath))
+        if progress is None:
+            continue
+        if progress.data_file != project.training_data_file:
+            raise ValueError(
+                f"Progress for {filepath} was recorded for another data file: "
+                f"{progress.data_file}"
+            )
+        return progress
+    return None
+
+
+def _update_batch_size(project: Project, progress: UpdateProgress | None) -> int:
+    batch_size = project.params.batch_size
+    if batch_size < 1:
+        raise ValueError("Update batch size must be positive.")
+    if progress is not None and progress.batch_size not in (None, batch_size):
+        logger.warning(
+            f"Resuming with batch_size={progress.batch_size} from the progress file "
+            f"instead of {batch_size}, so that the batches match the earlier run"
+        )
+        batch_size = progress.batch_size
+    checkpoint_every = project.params.checkpoint_every
+    if checkpoint_every is not None and checkpoint_every % batch_size != 0:
+        logger.warning(
+            f"checkpoint_every={checkpoint_every} is not a multiple of "
+            f"batch_size={batch_size}: checkpoints are taken at the end of the "
+            "first batch after one is due"
+        )
+    return batch_size
+
+
+def _batches(data: Iterator[T], batch_size: int) -> Iterator[list[T]]:
+    while batch := list(islice(data, batch_size)):
+        yield batch
+
+
+def _checkpoint_filepath(project: Project, n_data_points: int) -> str:
+    root, extension = os.path.splitext(project.posterior_file)
+    return f"{root}__checkpoint-{n_data_points}{extension}"
+
+
+def _remove_checkpoint(project: Project, progress: UpdateProgress) -> None:
+    leaves_file = progress.leaves_file
+    if leaves_file == _checkpoint_filepath(project, progress.n_data_points):
+        os.remove(leaves_file)
+        logger.info(f"Removed checkpoint: {leaves_file}")
+
+
+def _artifact_cache(project: Project) -> ArtifactCache | None:
+    if project.params.cache_dir is None:
+        return None
+    return ArtifactCache(project.params.cache_dir, project.params.cache_max_bytes)
+
+
+def _update_prior_cache_key(project: Project, data: DataSlice) -> str:
+    prior_file = project.prior_file
+    return cache_key(
+        "update_prior",
+        model=project.model_config,
+        preprocessor=project.preprocessor_config,
+        pruning=project.params.pruning,
+        workers=project.params.workers,
+        batch_size=project.params.batch_size,
+        prior=file_digest(prior_file) if prior_file is not None else None,
+        data=data.digest,
+        n_data_points=data.n_data_points,
+        coarsen_on_load=project.params.coarsen_on_load,
+        extension=os.path.splitext(project.posterior_file)[1],
     )
-    if project.prior_file is not None:
-        prior: Prior = Prior(load_leaves(project.prior_file))
+
+
+def cli_update_prior(project: Project, data_used: DataSlice | None = None) -> None:
+    domain = project.model.param_domain
+    progress_file = progress_filepath(project.posterior_file)
+    progress = _starting_progress(project)
+    batch_size = _update_batch_size(project, progress)
+
+    cache = _artifact_cache(project) if progress is None else None
+    if cache is not None:
+        if data_used is None:
+            data_used = data_slice(
+                project.training_data_file, project.params.n_data_points
+            )
+        key = _update_prior_cache_key(project, data_used)
+        if cache.restore(key, project.posterior_file):
+            progress = UpdateProgress(
+                data_file=project.training_data_file,
+                offset=data_used.offset,
+                n_data_points=data_used.n_data_points,
+                leaves_file=project.posterior_file,
+                batch_size=batch_size,
+            )
+            export_progress(progress, progress_file)
+            return
+    if progress is not None:
+        logger.info(
+            f"Resuming from {progress.leaves_file}: "
+            f"n_data_points={progress.n_data_points}, offset={progress.offset}"
+        )
+        prior: Prior = Prior(_load_leaves(project, progress.leaves_file))
+    elif project.prior_file is not None:
+        prior: Prior = Prior(_load_leaves(project, project.prior_file))
     else:
         prior: Prior = project.model.prior
+    if progress is None:
+        progress = UpdateProgress(
+            data_file=project.training_data_file,
+            offset=0,
+            n_data_points=0,
+            leaves_file=project.prior_file,
+        )
+    progress = progress._replace(batch_size=batch_size)
     likelihood: Likelihood = project.model.likelihood
-    posterior = update_prior(
-        prior=prior,
-        likelihood=likelihood,
-        data=data[: project.params.n_data_points],
-        leaf_bit_depth_range=project.params.leaf_bit_depth_range,
+
+    checkpoint_every = project.params.checkpoint_every
+    checkpoint_seconds = project.params.checkpoint_seconds
+    data = islice(
+        iter_data(
+            data_file=project.training_data_file,
+            preprocessor=project.io.preprocessor,
+            offset=progress.offset,
+        ),
+        max(0, project.params.n_data_points - progress.n_data_points),
+    )
+    posterior = Posterior(prior)
+    checkpoint = progress
+    checkpoint_time = time.monotonic()
+    # Batches do not depend on the checkpoint settings, and checkpoints are taken
+    # between batches, so a resumed update sees the same batches as an
+    # uninterrupted one and gives the same posterior.
+    for batch in _batches(data, batch_size):
+        posterior = update_prior(
+            prior=posterior,
+            likelihood=likelihood,
+            data=[datum for datum, _ in batch],
+            pruning=project.params.pruning,
+            workers=project.params.workers,
+        )
+        metrics.record_leaves("update_prior", posterior)
+        progress = progress._replace(
+            offset=batch[-1][1], n_data_points=progress.n_data_points + len(batch)
+        )
+        count_due = checkpoint_every is not None and (
+            progress.n_data_points - checkpoint.n_data_points >= checkpoint_every
+        )
+        time_due = checkpoint_seconds is not None and (
+            time.monotonic() - checkpoint_time >= checkpoint_seconds
+        )
+        if count_due or time_due:
+            leaves_file = _checkpoint_filepath(project, progress.n_data_points)
+            export_leaves(leaves=posterior, filepath=leaves_file, domain=domain)
+            export_progress(progress._replace(leaves_file=leaves_file), progress_file)
+            _remove_checkpoint(project, checkpoint)
+            checkpoint = progress._replace(leaves_file=leaves_file)
+            checkpoint_time = time.monotonic()
+
+    pruning = project.params.pruning
+    logger.info(
+        f"Pruning {pruning}: dropped {pruning.dropped_leaves} leaves and "
+        f"{pruning.dropped_mass:.3g} of the probability mass over "
+        f"{pruning.n_steps} pruning steps"
     )
-    export_leaves(leaves=posterior, filepath=project.posterior_file)
+    export_leaves(leaves=posterior, filepath=project.posterior_file, domain=domain)
+    export_progress(
+        progress._replace(leaves_file=project.posterior_file), progress_file
+    )
+    _remove_checkpoint(project, checkpoint)
+    if cache is not None:
+        cache.store(key, project.posterior_file)
 
 
-def cli_sample_posterior(project: Project) -> None:
-    samples = sample(
-        posterior=Posterior(load_leaves(filepath=project.posterior_file)),
+def _load_leaves(project: Project, filepath: str) -> LeafList:
+    leaves = load_leaves(filepath=filepath, domain=project.model.param_domain)
+    if project.params.coarsen_on_load:
+        n_leaves = len(leaves)
+        leaves = coarsen(leaves)
+        metrics.record_reduction("coarsen_on_load", n_leaves, len(leaves))
+        logger.info(f"Coarsened {filepath}: {n_leaves} -> {len(leaves)} leaves")
+    return leaves
+
+
+def _load_posterior(project: Project) -> Posterior:
+    return Posterior(_load_leaves(project, project.posterior_file))
+
+
+def _load_tree(project: Project) -> Tree:
+    domain = project.model.param_domain
+    index_file = tree_filepath(project.posterior_file)
+    tree = load_tree(index_file, domain=domain, source=project.posterior_file)
+    if tree is None:
+        tree = Tree(leaves=_load_posterior(project))
+        export_tree(tree, index_file, domain=domain, source=project.posterior_file)
+    return tree
+
+
+def _sample_posterior_cache_key(project: Project) -> str:
+    return cache_key(
+        "sample_posterior",
+        posterior=file_digest(project.posterior_file),
         domain=project.model.param_domain,
         n_posterior_samples=project.params.n_posterior_samples,
+        coarsen_on_load=project.params.coarsen_on_load,
+        strategy=project.params.strategy,
+        seed=project.params.seed,
+        workers=project.params.workers,
+        extension=os.path.splitext(project.posterior_samples_file)[1],
     )
-    export_samples(
-        samples=samples,
+
+
+def cli_sample_posterior(project: Project) -> None:
+    cache = _artifact_cache(project)
+    if cache is not None:
+        key = _sample_posterior_cache_key(project)
+        if cache.restore(key, project.posterior_samples_file):
+            return
+
+    tree = _load_tree(project)
+    if project.params.workers > 1:
+        chunks = sample_coordinates_parallel(
+            index_file=tree_filepath(project.posterior_file),
+            n_posterior_samples=project.params.n_posterior_samples,
+            workers=project.params.workers,
+            strategy=project.params.strategy,
+            seed=project.params.seed,
+        )
+    else:
+        chunks = sample_coordinates(
+            posterior=tree,
+            n_posterior_samples=project.params.n_posterior_samples,
+            strategy=project.params.strategy,
+            seed=project.params.seed,
+        )
+    export_sample_chunks(
+        chunks=chunks,
         filepath=project.posterior_samples_file,
         domain=project.model.param_domain,
     )
+    if cache is not None:
+        cache.store(key, project.posterior_samples_file)
 
 
 def cli_histogram(project: Project) -> None:
-    samples = load_samples(filepath=project.posterior_samples_file)
-    output_path = project.posterior_samples_file.replace(".csv", "__histogram.csv")
+    samples = load_samples(
+        filepath=project.posterior_samples_file, domain=project.model.param_domain
+    )
+    root, _ = os.path.splitext(project.posterior_samples_file)
+    output_path = root + "__histogram.csv"
     export_histogram(
         samples=samples, filepath=output_path, domain=project.model.param_domain
     )
@@ -63,23 +332,218 @@ def cli_predict(project: Project) -> None:
     input_data: list[DataPoint] = load_data(
         data_file=project.input_data_file, preprocessor=project.io.preprocessor
     )
-    parameter_samples = load_samples(filepath=project.posterior_samples_file)
-    for datum in input_data:
-        output_path = project.prediction_file.replace(".csv", f"__id-{datum.id}.csv")
-        predictions = predict(
-            model=project.model, parameter_samples=parameter_samples, x=datum.x
+    xs = [datum.x for datum in input_data]
+    if project.params.exact:
+        predictions = predict_exact(
+            model=project.model, posterior=_load_posterior(project), xs=xs
         )
-        export_prediction(
-            predictions=predictions,
-            filepath=output_path,
-            categories=project.model.categories,
+    else:
+        parameter_samples = load_samples(
+            filepath=project.posterior_samples_file,
+            domain=project.model.param_domain,
+        ).weighted
+        predictions = predict_batch(
+            model=project.model, parameter_samples=parameter_samples, xs=xs
         )
+    export_predictions(
+        predictions=predictions,
+        ids=[datum.id for datum in input_data],
+        filepath=project.prediction_file,
+        categories=project.model.categories,
+    )
+
+
+def cli_exact_histogram(project: Project) -> None:
+    hist = exact_histogram(
+        posterior=_load_posterior(project),
+        domain=project.model.param_domain,
+        n_bins=project.params.histogram_bins,
+    )
+    root, _ = os.path.splitext(project.posterior_file)
+    export_exact_histogram(
+        hist=hist,
+        filepath=root + "__exact_histogram.csv",
+        domain=project.model.param_domain,
+    )
+
+
+def cli_marginals(project: Project) -> None:
+    results = marginals(
+        posterior=_load_posterior(project),
+        domain=project.model.param_domain,
+        n_bins=project.params.histogram_bins,
+        quantile_levels=project.params.quantiles,
+    )
+    root, _ = os.path.splitext(project.posterior_file)
+    export_marginals(
+        marginals=results,
+        filepath=root + "__marginals.csv",
+        summary_filepath=root + "__marginal_summary.csv",
+    )
+
+
+def _scale_models(project: Project, bit_depths: list[int]) -> list[Model]:
+    model_type = type(project.model)
+    if "bit_depth" not in inspect.signature(model_type).parameters:
+        raise ValueError(
+            f"Cannot sweep scale_bit_depths: {model_type.__name__} has no "
+            "bit_depth parameter."
+        )
+    kwargs = project.model_config.get("kwargs", {})
+    return [
+        model_type(**{**kwargs, "bit_depth": bit_depth}) for bit_depth in bit_depths
+    ]
+
+
+def cli_scale_report(project: Project) -> None:
+    data: list[DataPoint] = load_data(
+        data_file=project.training_data_file, preprocessor=project.io.preprocessor
+    )
+    if project.params.scale_bit_depths is None:
+        models = [project.model]
+    else:
+        models = _scale_models(project, project.params.scale_bit_depths)
+    default_range = project.params.leaf_bit_depth_range
+    steps = scale_report(
+        models=models,
+        data=data,
+        leaf_bit_depth_ranges=project.params.scale_ranges or [default_range],
+        data_sizes=project.params.scale_data_sizes or [project.params.n_data_points],
+        n_samples=project.params.n_posterior_samples,
+    )
+    root, _ = os.path.splitext(project.posterior_file)
+    export_scale_report(
+        steps=steps,
+        exponents=growth_exponents(steps),
+        filepath=root + "__scale_report.csv",
+        exponents_filepath=root + "__scale_exponents.csv",
+    )
+
+
+def cli_convert(project: Project) -> None:
+    root, extension = os.path.splitext(project.posterior_file)
+    output_extension = (
+        ".json" if extension == LEAVES_FILE_EXTENSION else LEAVES_FILE_EXTENSION
+    )
+    convert_leaves(
+        input_filepath=project.posterior_file,
+        output_filepath=root + output_extension,
+        domain=project.model.param_domain,
+    )
+
+
+COMMANDS: dict[str, Callable[[Project], None]] = {
+    "update_prior": cli_update_prior,
+    "sample_posterior": cli_sample_posterior,
+    "histogram": cli_histogram,
+    "predict": cli_predict,
+    "exact_histogram": cli_exact_histogram,
+    "marginals": cli_marginals,
+    "scale_report": cli_scale_report,
+    "convert": cli_convert,
+}
+
+
+def _batch_task(config: str, command: str) -> BatchTask:
+    project = load_project(config=config)
+    if command == "update_prior":
+        inputs = [project.training_data_file, project.prior_file]
+        output = project.posterior_file
+    elif command == "sample_posterior":
+        inputs = [project.posterior_file]
+        output = project.posterior_samples_file
+    elif command == "predict":
+        inputs = [project.posterior_file, project.posterior_samples_file]
+        output = project.prediction_file
+    else:
+        inputs = [project.posterior_file, project.posterior_samples_file]
+        output = None
+    return BatchTask(
+        config=config,
+        command=command,
+        inputs=tuple([filepath for filepath in inputs if filepath is not None]),
+        output=output,
+    )
+
+
+def _run_batch_task(
+    config: str, command: str, cache_dir: str, data_slices: dict[str, DataSlice]
+) -> None:
+    project = load_project(config=config, cache_dir=cache_dir)
+    if command == "update_prior":
+        cli_update_prior(project, data_used=data_slices.get(config))
+    else:
+        COMMANDS[command](project)
+
+
+def _batch_data_slices(configs: list[str]) -> dict[str, DataSlice]:
+    slices = cache(data_slice)
+    data_slices: dict[str, DataSlice] = dict()
+    for config in configs:
+        project = load_project(config=config)
+        try:
+            data_slices[config] = slices(
+                project.training_data_file, project.params.n_data_points
+            )
+        except OSError as error:
+            logger.warning(f"Cannot read training data for {config}: {error}")
+    return data_slices
+
+
+def cli_batch(args: list[str]) -> None:
+    kwargs = vars(batch_parser.parse_args(args))
+    _configure_logging(kwargs["debug"])
+
+    configs = sorted({path for pattern in kwargs["configs"] for path in glob(pattern)})
+    if len(configs) == 0:
+        raise ValueError(f"No config files match {kwargs['configs']}")
+    logger.info(f"Batch of {len(configs)} project(s): {kwargs['commands']}")
+
+    # Projects with the same inputs share one run, through a common artifact cache.
+    # Each training file is hashed once, and the tasks are given its digest.
+    data_slices: dict[str, DataSlice] = dict()
+    if "update_prior" in kwargs["commands"]:
+        data_slices = _batch_data_slices(configs)
+
+    def task_key(task: BatchTask) -> str | None:
+        project = load_project(config=task.config)
+        if task.command == "update_prior":
+            if task.config not in data_slices:
+                raise FileNotFoundError(project.training_data_file)
+            return _update_prior_cache_key(project, data_slices[task.config])
+        if task.command == "sample_posterior":
+            return _sample_posterior_cache_key(project)
+        return None
+
+    with TemporaryDirectory() as temporary_dir:
+        cache_dir = kwargs["cache_dir"] or get_cache_dir() or temporary_dir
+        results = run_batch(
+            configs=configs,
+            commands=kwargs["commands"],
+            jobs=kwargs["jobs"] or os.cpu_count() or 1,
+            describe=_batch_task,
+            key=task_key,
+            run=partial(_run_batch_task, cache_dir=cache_dir, data_slices=data_slices),
+        )
+    for result in results:
+        shared = f" (shared with {result.shared_with})" if result.shared_with else ""
+        error = f": {result.error}" if result.error else ""
+        logger.info(
+            f"{result.config}: {result.command} {result.status} "
+            f"{result.seconds:.2f}s{shared}{error}"
+        )
+    export_batch_summary(results=results, filepath=kwargs["summary"])
+    failed = [result for result in results if result.status == "failed"]
+    if len(failed) > 0:
+        raise SystemExit(f"{len(failed)} batch task(s) failed")
 
 
 parser = argparse.ArgumentParser()
 parser.add_argument("config")
 parser.add_argument("--version", action="version", version=VERSION)
 parser.add_argument("--debug", action="store_true")
+parser.add_argument("--metrics")
+parser.add_argument("--profile")
 
 subparsers = parser.add_subparsers(required=True)
 
@@ -89,6 +553,17 @@ update_prior_parser.add_argument("--prior_file")
 update_prior_parser.add_argument("--posterior_file")
 update_prior_parser.add_argument("--data_file")
 update_prior_parser.add_argument("--n_data_points", type=int)
+update_prior_parser.add_argument("--workers", type=int)
+update_prior_parser.add_argument("--batch_size", type=int)
+update_prior_parser.add_argument("--checkpoint_every", type=int)
+update_prior_parser.add_argument("--checkpoint_seconds", type=float)
+update_prior_parser.add_argument("--resume", action="store_true")
+update_prior_parser.add_argument("--cache_dir")
+update_prior_parser.add_argument("--pruning", choices=PRUNING_POLICIES)
+update_prior_parser.add_argument("--pruning_epsilon", type=float)
+update_prior_parser.add_argument("--max_leaves", type=int)
+update_prior_parser.add_argument("--likelihood_bit_depth_range", type=int)
+update_prior_parser.add_argument("--coarsen_on_load", action="store_true")
 update_prior_parser.set_defaults(func=cli_update_prior)
 
 sample_posterior_parser = subparsers.add_parser("sample_posterior")
@@ -96,6 +571,11 @@ sample_posterior_parser.add_argument("--tags", nargs="*")
 sample_posterior_parser.add_argument("--posterior_file")
 sample_posterior_parser.add_argument("--posterior_samples_file")
 sample_posterior_parser.add_argument("--n_posterior_samples", type=int)
+sample_posterior_parser.add_argument("--cache_dir")
+sample_posterior_parser.add_argument("--coarsen_on_load", action="store_true")
+sample_posterior_parser.add_argument("--strategy", choices=SAMPLING_STRATEGIES)
+sample_posterior_parser.add_argument("--seed", type=int)
+sample_posterior_parser.add_argument("--workers", type=int)
 sample_posterior_parser.set_defaults(func=cli_sample_posterior)
 
 histogram_parser = subparsers.add_parser("histogram")
@@ -107,15 +587,81 @@ predict_parser = subparsers.add_parser("predict")
 predict_parser.add_argument("--tags", nargs="*")
 predict_parser.add_argument("--input_data_file")
 predict_parser.add_argument("--posterior_samples_file")
+predict_parser.add_argument("--posterior_file")
+predict_parser.add_argument("--exact", action="store_true")
+predict_parser.add_argument("--coarsen_on_load", action="store_true")
 predict_parser.set_defaults(func=cli_predict)
 
+exact_histogram_parser = subparsers.add_parser("exact_histogram")
+exact_histogram_parser.add_argument("--tags", nargs="*")
+exact_histogram_parser.add_argument("--posterior_file")
+exact_histogram_parser.add_argument("--histogram_bins", type=int)
+exact_histogram_parser.add_argument("--coarsen_on_load", action="store_true")
+exact_histogram_parser.set_defaults(func=cli_exact_histogram)
 
-def cli():
-    kwargs = vars(parser.parse_args())
+marginals_parser = subparsers.add_parser("marginals")
+marginals_parser.add_argument("--tags", nargs="*")
+marginals_parser.add_argument("--posterior_file")
+marginals_parser.add_argument("--histogram_bins", type=int)
+marginals_parser.add_argument("--quantiles", nargs="*", type=float)
+marginals_parser.add_argument("--coarsen_on_load", action="store_true")
+marginals_parser.set_defaults(func=cli_marginals)
+
+scale_report_parser = subparsers.add_parser("scale_report")
+scale_report_parser.add_argument("--tags", nargs="*")
+scale_report_parser.add_argument("--posterior_file")
+scale_report_parser.add_argument("--n_posterior_samples", type=int)
+scale_report_parser.add_argument("--scale_bit_depths", nargs="*", type=int)
+scale_report_parser.add_argument("--scale_ranges", nargs="*", type=int)
+scale_report_parser.add_argument("--scale_data_sizes", nargs="*", type=int)
+scale_report_parser.set_defaults(func=cli_scale_report)
+
+convert_parser = subparsers.add_parser("convert")
+convert_parser.add_argument("--tags", nargs="*")
+convert_parser.add_argument("--posterior_file")
+convert_parser.set_defaults(func=cli_convert)
+
+batch_parser = argparse.ArgumentParser(prog="gfs batch")
+batch_parser.add_argument("configs", nargs="+")
+batch_parser.add_argument("--jobs", type=int)
+batch_parser.add_argument(
+    "--commands",
+    nargs="+",
+    choices=list(COMMANDS),
+    default=["update_prior", "sample_posterior"],
+)
+batch_parser.add_argument("--cache_dir")
+batch_parser.add_argument("--summary", default="batch_summary.csv")
+batch_parser.add_argument("--debug", action="store_true")
 
-    if kwargs.get("debug"):
+
+def _configure_logging(debug: bool) -> None:
+    if debug:
         os.environ["LOGGING"] = "DEBUG"
     logging.basicConfig(level=get_logging_level())
 
+
+def cli():
+    if sys.argv[1:2] == ["batch"]:
+        cli_batch(sys.argv[2:])
+        return
+
+    kwargs = vars(parser.parse_args())
+    _configure_logging(kwargs.get("debug"))
+
     project = load_project(**kwargs)
-    kwargs["func"](project=project)
+    command = kwargs["func"].__name__.removeprefix("cli_")
+    run_metrics = metrics.enable(command, project.name) if kwargs["metrics"] else None
+    profiler = cProfile.Profile() if kwargs["profile"] else None
+    if profiler is not None:
+        profiler.enable()
+    try:
+        kwargs["func"](project=project)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(kwargs["profile"])
+            logger.info(f"Exported profile: {kwargs['profile']}")
+        if run_metrics is not None:
+            export_metrics(metrics=run_metrics, filepath=kwargs["metrics"])
+            metrics.disable()
@@ -1,5 +1,7 @@
 from typing import NamedTuple
 
+import numpy as np
+
 
 class Axis(NamedTuple):
     name: str
@@ -36,3 +38,13 @@ class Domain(list[Axis]):
         ]
 
         return tuple(float_coords)
+
+    def scale_array(self, int_coords: np.ndarray) -> np.ndarray:
+        if int_coords.shape[-1] != len(self):
+            raise ValueError(
+                "Number of integer coordinates not equal to dimension of Domain."
+            )
+
+        left_endpoints = np.array([axis.left_endpoint for axis in self])
+        scales = np.array([self._get_scale(axis) for axis in self])
+        return left_endpoints + int_coords * scales
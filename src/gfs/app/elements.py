@@ -1,5 +1,10 @@
 import logging
-from typing import Iterable, NamedTuple
+from typing import Iterable, Iterator, NamedTuple, Self
+
+import numpy as np
+
+from gfs.app.domain import Domain
+from gfs.constants import SAMPLES_CHUNK_SIZE
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +34,57 @@ class Histogram(dict[Parameter, int]):
         return 0
 
 
+def _count_coordinates(
+    coordinates: np.ndarray, counts: np.ndarray, domain: Domain
+) -> tuple[np.ndarray, np.ndarray]:
+    if domain.bit_depth < 63:
+        shape = tuple(1 << axis.bit_depth for axis in domain)
+        keys, inverse = np.unique(
+            np.ravel_multi_index(tuple(coordinates.T), shape), return_inverse=True
+        )
+        unique_coordinates = np.column_stack(np.unravel_index(keys, shape))
+    else:
+        unique_coordinates, inverse = np.unique(
+            coordinates, axis=0, return_inverse=True
+        )
+    unique_counts = np.zeros(len(unique_coordinates), dtype=np.int64)
+    np.add.at(unique_counts, inverse.reshape(-1), counts)
+    return unique_coordinates, unique_counts
+
+
+class WeightedParameterSamples(Histogram):
+    @classmethod
+    def from_coordinates(cls, chunks: Iterable[np.ndarray], domain: Domain) -> Self:
+        coordinates = np.zeros((0, len(domain)), dtype=np.int64)
+        counts = np.zeros(0, dtype=np.int64)
+        for chunk in chunks:
+            coordinates, counts = _count_coordinates(
+                np.concatenate([coordinates, chunk]),
+                np.concatenate([counts, np.ones(len(chunk), dtype=np.int64)]),
+                domain,
+            )
+
+        samples = cls()
+        parameters = domain.scale_array(coordinates).tolist()
+        for parameter, count in zip(parameters, counts.tolist()):
+            samples[Parameter(parameter)] = count
+        return samples
+
+    @property
+    def n_samples(self) -> int:
+        return sum(self.values())
+
+    def to_arrays(self) -> tuple[np.ndarray, np.ndarray]:
+        n_axes = len(next(iter(self))) if len(self) > 0 else 0
+        parameters = np.array(list(self.keys()), dtype=float).reshape(-1, n_axes)
+        counts = np.fromiter(self.values(), dtype=np.int64, count=len(self))
+        return parameters, counts
+
+    @property
+    def histogram(self) -> Histogram:
+        return self
+
+
 class ParameterSamples(list[Parameter]):
     @property
     def histogram(self) -> Histogram:
@@ -37,6 +93,71 @@ class ParameterSamples(list[Parameter]):
             hist[sample] += 1
         return hist
 
+    @property
+    def weighted(self) -> WeightedParameterSamples:
+        return WeightedParameterSamples(self.histogram)
+
+
+class ParameterSampleArray:
+    def __init__(self, coordinates: np.ndarray, domain: Domain) -> None:
+        if coordinates.ndim != 2 or coordinates.shape[1] != len(domain):
+            raise ValueError("Sample coordinates do not match dimension of Domain.")
+        self._coordinates = coordinates
+        self._domain = domain
+
+    @property
+    def coordinates(self) -> np.ndarray:
+        return self._coordinates
+
+    @property
+    def domain(self) -> Domain:
+        return self._domain
+
+    def __len__(self) -> int:
+        return len(self._coordinates)
+
+    def iter_chunks(self, chunk_size: int = SAMPLES_CHUNK_SIZE) -> Iterator[np.ndarray]:
+        for start in range(0, len(self), chunk_size):
+            chunk = self._coordinates[start : start + chunk_size]
+            yield self.domain.scale_array(chunk)
+
+    def __iter__(self) -> Iterator[Parameter]:
+        for chunk in self.iter_chunks():
+            for parameter in chunk.tolist():
+                yield Parameter(parameter)
+
+    @property
+    def weighted(self) -> WeightedParameterSamples:
+        chunks = (
+            self._coordinates[start : start + SAMPLES_CHUNK_SIZE]
+            for start in range(0, len(self), SAMPLES_CHUNK_SIZE)
+        )
+        return WeightedParameterSamples.from_coordinates(chunks, self.domain)
+
+    @property
+    def histogram(self) -> Histogram:
+        return self.weighted
+
+
+class ExactHistogram(dict[Parameter, float]):
+    pass
+
+
+class UpdateProgress(NamedTuple):
+    data_file: str
+    offset: int
+    n_data_points: int
+    leaves_file: str | None
+    batch_size: int | None = None
+
+
+class Marginal(NamedTuple):
+    axis: str
+    mean: float
+    variance: float
+    quantiles: dict[float, float]
+    masses: dict[float, float]
+
 
 class Distribution(tuple[float, ...]):
     def __init__(self, iterable: Iterable[float]):
@@ -45,15 +166,30 @@ class Distribution(tuple[float, ...]):
 
 
 class PredictiveDists(list[Distribution]):
+    def __init__(
+        self, iterable: Iterable[Distribution] = (), weights: Iterable[int] = ()
+    ):
+        super().__init__(iterable)
+        self.weights: list[int] = list(weights)
+
+    def append_weighted(self, dist: Distribution, weight: int) -> None:
+        if len(self.weights) != len(self):
+            raise ValueError("Cannot mix weighted and unweighted distributions.")
+        self.append(dist)
+        self.weights.append(weight)
+
     @property
     def mean(self) -> Distribution:
         n_dists = len(self)
         if n_dists == 0:
             raise ValueError("Cannot compute mean distribution of empty list.")
 
+        weights = self.weights if len(self.weights) == n_dists else [1] * n_dists
+        total_weight = sum(weights)
         category_means: list[float] = list()
         n_categories = len(self[0])
         for i in range(n_categories):
-            category_means.append(sum([dist[i] for dist in self]) / n_dists)
+            weighted_sum = sum([w * dist[i] for w, dist in zip(weights, self)])
+            category_means.append(weighted_sum / total_weight)
 
         return Distribution(category_means)
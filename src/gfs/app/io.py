@@ -2,16 +2,45 @@ import csv
 import json
 import logging
 import os
+import struct
 import tomllib
-from typing import Any, Type
+from functools import partial
+from queue import Queue
+from threading import Thread
+from typing import Any, BinaryIO, Callable, Iterable, Iterator, Type
 
+import numpy as np
+
+from gfs.app.batch import BatchResult
 from gfs.app.bayes import Model
-from gfs.app.domain import Domain
-from gfs.app.elements import DataPoint, Parameter, ParameterSamples, PredictiveDists
+from gfs.app.domain import Axis, Domain
+from gfs.app.elements import (
+    DataPoint,
+    ExactHistogram,
+    Marginal,
+    Parameter,
+    ParameterSampleArray,
+    ParameterSamples,
+    PredictiveDists,
+    UpdateProgress,
+    WeightedParameterSamples,
+)
 from gfs.app.project import Preprocessor, Project, ProjectIO, ProjectParams
-from gfs.constants import LEAF_BIT_DEPTH_RANGE
+from gfs.app.scale import GrowthExponent, ScaleStep
+from gfs.constants import (
+    CACHE_MAX_BYTES,
+    EXPORT_QUEUE_SIZE,
+    LEAF_BIT_DEPTH_RANGE,
+    LIKELIHOOD_BIT_DEPTH_RANGE,
+    QUANTILES,
+    UPDATE_BATCH_SIZE,
+    get_cache_dir,
+)
+from gfs.metrics import Metrics, timed
 from gfs.models.binomial import BinomialModel, BinomialPreprocessor
-from gfs.sample.leaf import Leaf, LeafList, Side
+from gfs.sample.leaf import LeafList
+from gfs.sample.prune import make_pruning
+from gfs.sample.tree import Tree
 
 logger = logging.getLogger(__name__)
 
@@ -23,53 +52,343 @@ PREPROCESSORS: dict[str, Type[Preprocessor]] = {
     "binomial": BinomialPreprocessor,
 }
 
+BINARY_FILE_DTYPE = np.dtype("<i8")
+BINARY_FLOAT_DTYPE = np.dtype("<f8")
+BINARY_FILE_ALIGNMENT = 64
+_BINARY_FILE_PREAMBLE = struct.Struct("<8sII")
+
+LEAVES_FILE_EXTENSION = ".leaves"
+LEAVES_FILE_MAGIC = b"GFSLEAF\x00"
+LEAVES_FILE_VERSION = 1
+
+SAMPLES_FILE_EXTENSION = ".samples"
+SAMPLES_FILE_MAGIC = b"GFSSAMP\x00"
+SAMPLES_FILE_VERSION = 1
+
+TREE_FILE_EXTENSION = ".tree"
+TREE_FILE_MAGIC = b"GFSTREE\x00"
+TREE_FILE_VERSION = 2
+
+PROGRESS_FILE_SUFFIX = "__progress.json"
+
 
 class LeafDecoder(json.JSONDecoder):
     def decode(self, s: str) -> LeafList:
         raw_leaves = super().decode(s)
-        leaves: LeafList = LeafList()
-        for raw_leaf in raw_leaves:
-            leaves.append(
-                Leaf(
-                    multiplicity=raw_leaf[0],
-                    sides=[
-                        Side(endpoint=raw_side[0], bit_depth=raw_side[1])
-                        for raw_side in raw_leaf[1]
-                    ],
-                )
-            )
-        return leaves
+        return LeafList.from_arrays(
+            multiplicity=[raw_leaf[0] for raw_leaf in raw_leaves],
+            endpoints=[
+                [raw_side[0] for raw_side in raw_leaf[1]] for raw_leaf in raw_leaves
+            ],
+            side_bit_depths=[
+                [raw_side[1] for raw_side in raw_leaf[1]] for raw_leaf in raw_leaves
+            ],
+        )
 
 
 def _make_dir(filepath: str) -> None:
     filepath_tokens = filepath.split("/")
     directory = "/".join(filepath_tokens[:-1])
-    os.makedirs(directory, exist_ok=True)
+    if directory != "":
+        os.makedirs(directory, exist_ok=True)
+
+
+def iter_data(
+    data_file: str, preprocessor: Preprocessor, offset: int = 0
+) -> Iterator[tuple[DataPoint, int]]:
+    with open(data_file, "rb") as f:
+        f.seek(offset)
+        logger.info(f"Reading data: {data_file}, offset={offset}")
+        for line in f:
+            offset += len(line)
+            for row in csv.reader([line.decode("utf-8")]):
+                yield preprocessor.process_row(row), offset
 
 
+@timed("load_data")
 def load_data(data_file: str, preprocessor: Preprocessor) -> list[DataPoint]:
-    with open(data_file, "r") as f:
-        reader = csv.reader(f)
-        data = [preprocessor.process_row(row) for row in reader]
+    data = [datum for datum, _ in iter_data(data_file, preprocessor)]
     logger.info(f"Loaded data: {data_file}")
     return data
 
 
-def load_leaves(filepath: str) -> LeafList:
+def progress_filepath(leaves_filepath: str) -> str:
+    root, _ = os.path.splitext(leaves_filepath)
+    return root + PROGRESS_FILE_SUFFIX
+
+
+def load_progress(filepath: str) -> UpdateProgress | None:
+    if not os.path.exists(filepath):
+        return None
     with open(filepath, "r") as f:
-        leaves: LeafList = json.load(f, cls=LeafDecoder)
+        progress = UpdateProgress(**json.load(f))
+    logger.info(f"Loaded progress: {filepath}")
+    return progress
+
+
+def export_progress(progress: UpdateProgress, filepath: str) -> None:
+    _make_dir(filepath=filepath)
+    with open(filepath + ".tmp", "w") as f:
+        json.dump(progress._asdict(), f)
+    os.replace(filepath + ".tmp", filepath)
+    logger.info(f"Exported progress: {filepath}")
+
+
+def _is_binary_leaves_file(filepath: str) -> bool:
+    return os.path.splitext(filepath)[1] == LEAVES_FILE_EXTENSION
+
+
+def _is_binary_samples_file(filepath: str) -> bool:
+    return os.path.splitext(filepath)[1] == SAMPLES_FILE_EXTENSION
+
+
+def _align(offset: int) -> int:
+    return -(-offset // BINARY_FILE_ALIGNMENT) * BINARY_FILE_ALIGNMENT
+
+
+def _check_domain(header: dict[str, Any], domain: Domain, filepath: str) -> None:
+    axes = header.get("domain")
+    if axes is not None and [Axis(*axis) for axis in axes] != list(domain):
+        raise ValueError(f"File {filepath} was exported for another domain.")
+
+
+def _domain_from_header(header: dict[str, Any]) -> Domain | None:
+    axes = header.get("domain")
+    return Domain([Axis(*axis) for axis in axes]) if axes is not None else None
+
+
+def _write_binary_header(
+    f: BinaryIO, magic: bytes, version: int, header: dict[str, Any], length: int
+) -> None:
+    f.seek(0)
+    f.write(_BINARY_FILE_PREAMBLE.pack(magic, version, length))
+    f.write(json.dumps(header).encode("utf-8").ljust(length))
+
+
+def _read_binary_header(filepath: str, magic: bytes, version: int) -> dict[str, Any]:
+    with open(filepath, "rb") as f:
+        file_magic, file_version, length = _BINARY_FILE_PREAMBLE.unpack(
+            f.read(_BINARY_FILE_PREAMBLE.size)
+        )
+        if file_magic != magic:
+            raise ValueError(f"Unexpected binary file type: {filepath}")
+        if file_version != version:
+            raise ValueError(f"Unsupported file version {file_version}: {filepath}")
+        return json.loads(f.read(length).decode("utf-8"))
+
+
+def _load_leaves_json(filepath: str) -> LeafList:
+    with open(filepath, "r") as f:
+        return json.load(f, cls=LeafDecoder)
+
+
+def _export_leaves_json(leaves: LeafList, filepath: str) -> None:
+    raw_leaves = [
+        [multiplicity, [list(side) for side in zip(endpoints, bit_depths)]]
+        for multiplicity, endpoints, bit_depths in zip(
+            leaves.multiplicity.tolist(),
+            leaves.endpoints.tolist(),
+            leaves.side_bit_depths.tolist(),
+        )
+    ]
+    with open(filepath, "w") as f:
+        json.dump(raw_leaves, f)
+
+
+def load_leaves_header(filepath: str) -> dict[str, Any]:
+    return _read_binary_header(filepath, LEAVES_FILE_MAGIC, LEAVES_FILE_VERSION)
+
+
+def _load_binary_columns(
+    filepath: str, header: dict[str, Any], shapes: dict[str, tuple[int, ...]]
+) -> dict[str, np.ndarray]:
+    dtypes: dict[str, str] = header.get("dtypes") or dict()
+    columns: dict[str, np.ndarray] = dict()
+    for name, shape in shapes.items():
+        dtype = np.dtype(dtypes.get(name, BINARY_FILE_DTYPE))
+        if shape[0] == 0:
+            columns[name] = np.zeros(shape, dtype=dtype)
+            continue
+        columns[name] = np.memmap(
+            filepath,
+            dtype=dtype,
+            mode="r",
+            offset=header["offsets"][name],
+            shape=shape,
+        )
+    return columns
+
+
+def _column_dtype(column: np.ndarray) -> np.dtype:
+    return BINARY_FLOAT_DTYPE if column.dtype.kind == "f" else BINARY_FILE_DTYPE
+
+
+def _export_binary_columns(
+    filepath: str,
+    magic: bytes,
+    version: int,
+    header: dict[str, Any],
+    columns: dict[str, np.ndarray],
+) -> None:
+    dtypes = {name: _column_dtype(column) for name, column in columns.items()}
+    header = {
+        **header,
+        "dtype": BINARY_FILE_DTYPE.str,
+        "offsets": {name: (1 << 63) - 1 for name in columns},
+    }
+    if any(dtype != BINARY_FILE_DTYPE for dtype in dtypes.values()):
+        header["dtypes"] = {name: dtype.str for name, dtype in dtypes.items()}
+
+    # Reserve room for the widest possible offsets, then lay out the columns.
+    header_length = len(json.dumps(header))
+    offset = _align(_BINARY_FILE_PREAMBLE.size + header_length)
+    for name, column in columns.items():
+        header["offsets"][name] = offset
+        offset = _align(offset + column.size * dtypes[name].itemsize)
+
+    with open(filepath, "wb") as f:
+        _write_binary_header(f, magic, version, header, header_length)
+        for name, column in columns.items():
+            f.seek(header["offsets"][name])
+            np.ascontiguousarray(column, dtype=dtypes[name]).tofile(f)
+
+
+def _leaf_shapes(header: dict[str, Any]) -> dict[str, tuple[int, ...]]:
+    n_leaves: int = header["n_leaves"]
+    n_axes: int = header["n_axes"]
+    return {
+        "multiplicity": (n_leaves,),
+        "endpoints": (n_leaves, n_axes),
+        "side_bit_depths": (n_leaves, n_axes),
+    }
+
+
+def _leaf_columns(leaves: LeafList) -> dict[str, np.ndarray]:
+    return {
+        "multiplicity": leaves.multiplicity,
+        "endpoints": leaves.endpoints,
+        "side_bit_depths": leaves.side_bit_depths,
+    }
+
+
+def _domain_header(domain: Domain | None) -> list[list[Any]] | None:
+    return [list(axis) for axis in domain] if domain is not None else None
+
+
+def _load_leaves_binary(filepath: str, domain: Domain | None) -> LeafList:
+    header = load_leaves_header(filepath)
+    if domain is not None:
+        _check_domain(header, domain, filepath)
+    columns = _load_binary_columns(filepath, header, _leaf_shapes(header))
+    return LeafList.from_arrays(**columns)
+
+
+def _export_leaves_binary(
+    leaves: LeafList, filepath: str, domain: Domain | None
+) -> None:
+    header: dict[str, Any] = {
+        "n_leaves": len(leaves),
+        "n_axes": leaves.n_axes,
+        "domain": _domain_header(domain),
+    }
+    _export_binary_columns(
+        filepath, LEAVES_FILE_MAGIC, LEAVES_FILE_VERSION, header, _leaf_columns(leaves)
+    )
+
+
+def tree_filepath(leaves_filepath: str) -> str:
+    root, _ = os.path.splitext(leaves_filepath)
+    return root + TREE_FILE_EXTENSION
+
+
+def _source_stamp(filepath: str) -> dict[str, int]:
+    stat = os.stat(filepath)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+@timed("load_tree")
+def load_tree(
+    filepath: str, domain: Domain | None = None, source: str | None = None
+) -> Tree | None:
+    if not os.path.exists(filepath):
+        return None
+    try:
+        header = _read_binary_header(filepath, TREE_FILE_MAGIC, TREE_FILE_VERSION)
+    except ValueError as error:
+        logger.info(f"Tree index cannot be used: {error}")
+        return None
+    if domain is not None:
+        _check_domain(header, domain, filepath)
+    if source is not None and header["source"] != _source_stamp(source):
+        logger.info(f"Tree index is out of date: {filepath}")
+        return None
+
+    shapes = {**_leaf_shapes(header), "cumulative_weights": (header["n_leaves"],)}
+    columns = _load_binary_columns(filepath, header, shapes)
+    cumulative_weights = columns.pop("cumulative_weights")
+    tree = Tree.from_index(
+        leaves=LeafList.from_arrays(**columns),
+        cumulative_weights=cumulative_weights,
+    )
+    logger.info(f"Loaded tree index: {filepath}")
+    return tree
+
+
+@timed("export_tree")
+def export_tree(
+    tree: Tree, filepath: str, domain: Domain | None = None, source: str | None = None
+) -> None:
+    _make_dir(filepath=filepath)
+    header: dict[str, Any] = {
+        "n_leaves": len(tree.leaves),
+        "n_axes": tree.leaves.n_axes,
+        "domain": _domain_header(domain),
+        "source": _source_stamp(source) if source is not None else None,
+    }
+    columns = {
+        **_leaf_columns(tree.leaves),
+        "cumulative_weights": tree.cumulative_weights,
+    }
+    _export_binary_columns(
+        filepath + ".tmp", TREE_FILE_MAGIC, TREE_FILE_VERSION, header, columns
+    )
+    os.replace(filepath + ".tmp", filepath)
+    logger.info(f"Exported tree index: {filepath}")
+
+
+@timed("load_leaves")
+def load_leaves(filepath: str, domain: Domain | None = None) -> LeafList:
+    if _is_binary_leaves_file(filepath):
+        leaves = _load_leaves_binary(filepath, domain=domain)
+    else:
+        leaves = _load_leaves_json(filepath)
     logger.info(f"Loaded leaves: {filepath}")
     return leaves
 
 
-def export_leaves(leaves: LeafList, filepath: str) -> None:
+@timed("export_leaves")
+def export_leaves(
+    leaves: LeafList, filepath: str, domain: Domain | None = None
+) -> None:
     _make_dir(filepath=filepath)
-    with open(filepath, "w") as f:
-        json.dump(leaves, f)
+    root, extension = os.path.splitext(filepath)
+    partial_filepath = root + ".tmp" + extension
+    if _is_binary_leaves_file(filepath):
+        _export_leaves_binary(leaves, partial_filepath, domain=domain)
+    else:
+        _export_leaves_json(leaves, partial_filepath)
+    os.replace(partial_filepath, filepath)
     logger.info(f"Exported leaves: {filepath}")
 
 
-def load_samples(filepath: str, header: bool = True) -> ParameterSamples:
+def convert_leaves(
+    input_filepath: str, output_filepath: str, domain: Domain | None = None
+) -> None:
+    leaves = load_leaves(filepath=input_filepath, domain=domain)
+    export_leaves(leaves=leaves, filepath=output_filepath, domain=domain)
+
+
+def _load_samples_csv(filepath: str, header: bool) -> ParameterSamples:
     samples = ParameterSamples()
     with open(filepath) as f:
         reader = csv.reader(f)
@@ -78,6 +397,39 @@ def load_samples(filepath: str, header: bool = True) -> ParameterSamples:
         for row in reader:
             float_row = [float(v) for v in row]
             samples.append(Parameter(float_row))
+    return samples
+
+
+def _load_samples_binary(filepath: str, domain: Domain | None) -> ParameterSampleArray:
+    header = _read_binary_header(filepath, SAMPLES_FILE_MAGIC, SAMPLES_FILE_VERSION)
+    if domain is not None:
+        _check_domain(header, domain, filepath)
+    domain = domain or _domain_from_header(header)
+    if domain is None:
+        raise ValueError(f"Samples file {filepath} has no domain; pass one in.")
+
+    shape = (header["n_samples"], header["n_axes"])
+    if header["n_samples"] == 0:
+        coordinates = np.zeros(shape, dtype=BINARY_FILE_DTYPE)
+    else:
+        coordinates = np.memmap(
+            filepath,
+            dtype=BINARY_FILE_DTYPE,
+            mode="r",
+            offset=header["offset"],
+            shape=shape,
+        )
+    return ParameterSampleArray(coordinates=coordinates, domain=domain)
+
+
+@timed("load_samples")
+def load_samples(
+    filepath: str, header: bool = True, domain: Domain | None = None
+) -> ParameterSamples | ParameterSampleArray:
+    if _is_binary_samples_file(filepath):
+        samples = _load_samples_binary(filepath, domain=domain)
+    else:
+        samples = _load_samples_csv(filepath, header=header)
     logger.info(f"Loaded samples: {filepath}")
     return samples
 
@@ -92,7 +444,99 @@ def export_samples(samples: ParameterSamples, filepath: str, domain: Domain) ->
     logger.info(f"Exported samples: {filepath}")
 
 
-def export_histogram(samples: ParameterSamples, filepath: str, domain: Domain) -> None:
+def _export_sample_chunks_csv(
+    chunks: Iterable[np.ndarray], filepath: str, domain: Domain
+) -> None:
+    with open(filepath, "w") as f:
+        writer = csv.writer(f)
+        writer.writerow([axis.name for axis in domain])
+        for chunk in chunks:
+            writer.writerows(domain.scale_array(chunk).tolist())
+
+
+def _export_sample_chunks_binary(
+    chunks: Iterable[np.ndarray], filepath: str, domain: Domain
+) -> None:
+    header: dict[str, Any] = {
+        "n_samples": (1 << 63) - 1,
+        "n_axes": len(domain),
+        "dtype": BINARY_FILE_DTYPE.str,
+        "domain": _domain_header(domain),
+        "offset": (1 << 63) - 1,
+    }
+    header_length = len(json.dumps(header))
+    header["offset"] = _align(_BINARY_FILE_PREAMBLE.size + header_length)
+    header["n_samples"] = 0
+
+    with open(filepath, "wb") as f:
+        f.seek(header["offset"])
+        for chunk in chunks:
+            np.ascontiguousarray(chunk, dtype=BINARY_FILE_DTYPE).tofile(f)
+            header["n_samples"] += len(chunk)
+        _write_binary_header(
+            f, SAMPLES_FILE_MAGIC, SAMPLES_FILE_VERSION, header, header_length
+        )
+
+
+def _write_in_background(
+    write: Callable[[Iterable[np.ndarray]], None],
+    chunks: Iterable[np.ndarray],
+    queue_size: int,
+) -> None:
+    queue: Queue[np.ndarray | None] = Queue(maxsize=queue_size)
+    errors: list[BaseException] = list()
+    finished = False
+
+    def queued_chunks() -> Iterator[np.ndarray]:
+        nonlocal finished
+        while (chunk := queue.get()) is not None:
+            yield chunk
+        finished = True
+
+    def run() -> None:
+        try:
+            write(queued_chunks())
+        except BaseException as error:
+            errors.append(error)
+            # Keep draining, so that the producer is never blocked on a full queue.
+            while not finished and queue.get() is not None:
+                pass
+
+    writer = Thread(target=run, name="export-samples", daemon=True)
+    writer.start()
+    try:
+        for chunk in chunks:
+            if len(errors) > 0:
+                break
+            queue.put(chunk)
+    finally:
+        queue.put(None)
+        writer.join()
+    if len(errors) > 0:
+        raise errors[0]
+
+
+@timed("export_samples")
+def export_sample_chunks(
+    chunks: Iterable[np.ndarray],
+    filepath: str,
+    domain: Domain,
+    queue_size: int = EXPORT_QUEUE_SIZE,
+) -> None:
+    _make_dir(filepath=filepath)
+    if _is_binary_samples_file(filepath):
+        write = partial(_export_sample_chunks_binary, filepath=filepath, domain=domain)
+    else:
+        write = partial(_export_sample_chunks_csv, filepath=filepath, domain=domain)
+    _write_in_background(write, chunks, queue_size)
+    logger.info(f"Exported samples: {filepath}")
+
+
+def export_histogram(
+    samples: ParameterSamples | ParameterSampleArray | WeightedParameterSamples,
+    filepath: str,
+    domain: Domain,
+) -> None:
     hist = samples.histogram
     _make_dir(filepath=filepath)
     with open(filepath, "w") as f:
@@ -103,6 +547,39 @@ def export_histogram(samples: ParameterSamples, filepath: str, domain: Domain) -
     logger.info(f"Exported histogram: {filepath}")
 
 
+def export_exact_histogram(hist: ExactHistogram, filepath: str, domain: Domain) -> None:
+    _make_dir(filepath=filepath)
+    with open(filepath, "w") as f:
+        writer = csv.writer(f)
+        writer.writerow([axis.name for axis in domain] + ["probability"])
+        for parameter, probability in hist.items():
+            writer.writerow(list(parameter) + [probability])
+    logger.info(f"Exported exact histogram: {filepath}")
+
+
+def export_marginals(
+    marginals: list[Marginal], filepath: str, summary_filepath: str
+) -> None:
+    _make_dir(filepath=filepath)
+    with open(filepath, "w") as f:
+        writer = csv.writer(f)
+        writer.writerow(["axis", "value", "probability"])
+        for marginal in marginals:
+            for value, probability in marginal.masses.items():
+                writer.writerow([marginal.axis, value, probability])
+    logger.info(f"Exported marginals: {filepath}")
+
+    _make_dir(filepath=summary_filepath)
+    with open(summary_filepath, "w") as f:
+        writer = csv.writer(f)
+        levels = list(marginals[0].quantiles) if len(marginals) > 0 else []
+        writer.writerow(["axis", "mean", "variance"] + [f"q{lv}" for lv in levels])
+        for marginal in marginals:
+            summary = [marginal.axis, marginal.mean, marginal.variance]
+            writer.writerow(summary + list(marginal.quantiles.values()))
+    logger.info(f"Exported marginal summary: {summary_filepath}")
+
+
 def export_prediction(
     predictions: PredictiveDists, filepath: str, categories: tuple[str]
 ) -> None:
@@ -114,6 +591,60 @@ def export_prediction(
     logger.info(f"Exported prediction: {filepath}")
 
 
+@timed("export_predictions")
+def export_predictions(
+    predictions: np.ndarray, ids: list[int], filepath: str, categories: tuple[str]
+) -> None:
+    _make_dir(filepath=filepath)
+    with open(filepath, "w") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id"] + list(categories))
+        for id, prediction in zip(ids, predictions.tolist()):
+            writer.writerow([id] + prediction)
+    logger.info(f"Exported predictions: {filepath}")
+
+
+def export_scale_report(
+    steps: list[ScaleStep],
+    exponents: list[GrowthExponent],
+    filepath: str,
+    exponents_filepath: str,
+) -> None:
+    _make_dir(filepath=filepath)
+    with open(filepath, "w") as f:
+        writer = csv.writer(f)
+        writer.writerow(ScaleStep._fields)
+        writer.writerows(steps)
+    logger.info(f"Exported scale report: {filepath}")
+
+    _make_dir(filepath=exponents_filepath)
+    with open(exponents_filepath, "w") as f:
+        writer = csv.writer(f)
+        writer.writerow(GrowthExponent._fields)
+        writer.writerows(exponents)
+    logger.info(f"Exported growth exponents: {exponents_filepath}")
+
+
+def export_batch_summary(results: list[BatchResult], filepath: str) -> None:
+    _make_dir(filepath=filepath)
+    with open(filepath, "w") as f:
+        writer = csv.writer(f)
+        writer.writerow(BatchResult._fields)
+        writer.writerows(results)
+    logger.info(f"Exported batch summary: {filepath}")
+
+
+def export_metrics(metrics: Metrics, filepath: str) -> None:
+    _make_dir(filepath=filepath)
+    with open(filepath, "w") as f:
+        json.dump(metrics.to_dict(), f, indent=2)
+    logger.info(f"Exported metrics: {filepath}")
+
+
+def _first_set(*values: Any) -> Any:
+    return next((value for value in values if value is not None), None)
+
+
 def load_project(**kwargs) -> Project:
     config_file = kwargs["config"]
     with open(config_file, "rb") as f:
@@ -143,13 +674,60 @@ def load_project(**kwargs) -> Project:
         prediction_file=(kwargs.get("prediction_file") or config_io["prediction_file"]),
     )
 
+    leaf_bit_depth_range = (
+        config_params.get("leaf_bit_depth_range") or LEAF_BIT_DEPTH_RANGE
+    )
+    likelihood_bit_depth_range = kwargs.get("likelihood_bit_depth_range") or (
+        config_params.get("likelihood_bit_depth_range") or LIKELIHOOD_BIT_DEPTH_RANGE
+    )
     params = ProjectParams(
         n_posterior_samples=(
             kwargs.get("n_posterior_samples") or config_params["n_posterior_samples"]
         ),
         n_data_points=kwargs.get("n_data_points") or config_params["n_data_points"],
-        leaf_bit_depth_range=(
-            config_params.get("leaf_bit_depth_range") or LEAF_BIT_DEPTH_RANGE
+        leaf_bit_depth_range=leaf_bit_depth_range,
+        pruning=make_pruning(
+            name=kwargs.get("pruning") or config_params.get("pruning") or "range",
+            leaf_bit_depth_range=leaf_bit_depth_range,
+            likelihood_bit_depth_range=likelihood_bit_depth_range,
+            epsilon=(
+                kwargs.get("pruning_epsilon") or config_params.get("pruning_epsilon")
+            ),
+            max_leaves=kwargs.get("max_leaves") or config_params.get("max_leaves"),
+        ),
+        workers=kwargs.get("workers") or config_params.get("workers") or 1,
+        histogram_bins=(
+            kwargs.get("histogram_bins") or config_params.get("histogram_bins")
+        ),
+        quantiles=tuple(
+            kwargs.get("quantiles") or config_params.get("quantiles") or QUANTILES
+        ),
+        exact=kwargs.get("exact") or config_params.get("exact") or False,
+        batch_size=_first_set(
+            kwargs.get("batch_size"), config_params.get("batch_size"), UPDATE_BATCH_SIZE
+        ),
+        checkpoint_every=(
+            kwargs.get("checkpoint_every") or config_params.get("checkpoint_every")
+        ),
+        checkpoint_seconds=(
+            kwargs.get("checkpoint_seconds") or config_params.get("checkpoint_seconds")
+        ),
+        resume=kwargs.get("resume") or config_params.get("resume") or False,
+        scale_bit_depths=(
+            kwargs.get("scale_bit_depths") or config_params.get("scale_bit_depths")
+        ),
+        scale_ranges=kwargs.get("scale_ranges") or config_params.get("scale_ranges"),
+        cache_dir=(
+            kwargs.get("cache_dir") or config_params.get("cache_dir") or get_cache_dir()
+        ),
+        cache_max_bytes=config_params.get("cache_max_bytes", CACHE_MAX_BYTES),
+        strategy=kwargs.get("strategy") or config_params.get("strategy") or "iid",
+        seed=_first_set(kwargs.get("seed"), config_params.get("seed")),
+        coarsen_on_load=bool(
+            kwargs.get("coarsen_on_load") or config_params.get("coarsen_on_load")
+        ),
+        scale_data_sizes=(
+            kwargs.get("scale_data_sizes") or config_params.get("scale_data_sizes")
         ),
     )
 
@@ -159,6 +737,8 @@ def load_project(**kwargs) -> Project:
         model=MODELS[model_name](**model_kwargs),
         io=project_io,
         params=params,
+        model_config={"name": model_name, "kwargs": model_kwargs},
+        preprocessor_config={"name": preprocessor_name, "kwargs": preprocessor_kwargs},
     )
 
     return project
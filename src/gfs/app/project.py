@@ -1,9 +1,16 @@
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Any
 
 from gfs.app.bayes import Model
 from gfs.app.elements import DataPoint
-from gfs.constants import LEAF_BIT_DEPTH_RANGE
+from gfs.constants import (
+    CACHE_MAX_BYTES,
+    LEAF_BIT_DEPTH_RANGE,
+    QUANTILES,
+    UPDATE_BATCH_SIZE,
+)
+from gfs.sample.prune import FixedRange, Pruning
 
 
 class Preprocessor(ABC):
@@ -31,6 +38,23 @@ class ProjectParams:
     n_posterior_samples: int
     n_data_points: int
     leaf_bit_depth_range: int = LEAF_BIT_DEPTH_RANGE
+    pruning: Pruning = field(default_factory=FixedRange)
+    workers: int = 1
+    histogram_bins: int | None = None
+    quantiles: tuple[float, ...] = QUANTILES
+    exact: bool = False
+    batch_size: int = UPDATE_BATCH_SIZE
+    checkpoint_every: int | None = None
+    checkpoint_seconds: float | None = None
+    resume: bool = False
+    scale_bit_depths: list[int] | None = None
+    scale_ranges: list[int] | None = None
+    scale_data_sizes: list[int] | None = None
+    cache_dir: str | None = None
+    cache_max_bytes: int = CACHE_MAX_BYTES
+    coarsen_on_load: bool = False
+    strategy: str = "iid"
+    seed: int | None = None
 
 
 @dataclass
@@ -40,6 +64,8 @@ class Project:
     model: Model
     io: ProjectIO
     params: ProjectParams
+    model_config: dict[str, Any] = field(default_factory=dict)
+    preprocessor_config: dict[str, Any] = field(default_factory=dict)
 
     @property
     def _template_values(self) -> dict[str, str]:
@@ -0,0 +1,117 @@
+import logging
+import multiprocessing
+from queue import Empty
+from typing import Iterator
+
+import numpy as np
+
+from gfs.app.io import load_tree
+from gfs.constants import SAMPLES_CHUNK_SIZE
+from gfs.sample.qmc import make_points
+
+logger = logging.getLogger(__name__)
+
+WORKER_QUEUE_SIZE = 2
+WORKER_POLL_SECONDS = 1.0
+
+
+def _worker_n_samples(
+    n_samples: int, chunk_size: int, workers: int, worker: int
+) -> int:
+    n_chunks = -(-n_samples // chunk_size)
+    n_worker_chunks = len(range(worker, n_chunks, workers))
+    if n_worker_chunks == 0:
+        return 0
+    last_chunk = worker + (n_worker_chunks - 1) * workers
+    last_chunk_size = min(chunk_size, n_samples - last_chunk * chunk_size)
+    return (n_worker_chunks - 1) * chunk_size + last_chunk_size
+
+
+def _sample_in_worker(
+    index_file: str,
+    n_samples: int,
+    chunk_size: int,
+    strategy: str,
+    seed: np.random.SeedSequence,
+    queue: multiprocessing.Queue,
+) -> None:
+    try:
+        tree = load_tree(index_file)
+        if tree is None:
+            raise FileNotFoundError(f"Tree index not found: {index_file}")
+        points = make_points(
+            strategy, n_dims=1 + tree.leaves.n_axes, rng=np.random.default_rng(seed)
+        )
+        for chunk in tree.iter_samples(n_samples, chunk_size, points=points):
+            queue.put(chunk)
+    except Exception as error:
+        queue.put(error)
+
+
+def _next_chunk(
+    queue: multiprocessing.Queue, process: multiprocessing.Process, worker: int
+) -> np.ndarray:
+    # A worker that dies without reporting an error, such as one killed for
+    # running out of memory, would otherwise leave the parent waiting forever.
+    while True:
+        try:
+            chunk = queue.get(timeout=WORKER_POLL_SECONDS)
+        except Empty:
+            # Once a worker has exited, nothing more can arrive on its queue.
+            if process.exitcode is None or not queue.empty():
+                continue
+            raise RuntimeError(
+                f"Sampling worker {worker} exited with code {process.exitcode} "
+                "before sending all of its samples."
+            ) from None
+        if isinstance(chunk, Exception):
+            raise chunk
+        return chunk
+
+
+def sample_coordinates_parallel(
+    index_file: str,
+    n_posterior_samples: int,
+    workers: int,
+    chunk_size: int = SAMPLES_CHUNK_SIZE,
+    strategy: str = "iid",
+    seed: int | None = None,
+) -> Iterator[np.ndarray]:
+    seed_sequence = np.random.SeedSequence(seed)
+    logger.info(
+        f"Sampling posterior: n_posterior_samples={n_posterior_samples}, "
+        f"strategy={strategy}, workers={workers}, seed={seed_sequence.entropy}"
+    )
+
+    # Chunk k is drawn by worker k % workers, from that worker's own stream, and
+    # chunks are merged back in order, so output depends only on seed and workers.
+    # Workers memory-map the tree index instead of receiving the leaves.
+    queues = [multiprocessing.Queue(WORKER_QUEUE_SIZE) for _ in range(0, workers)]
+    processes = [
+        multiprocessing.Process(
+            target=_sample_in_worker,
+            args=(
+                index_file,
+                _worker_n_samples(n_posterior_samples, chunk_size, workers, worker),
+                chunk_size,
+                strategy,
+                worker_seed,
+                queue,
+            ),
+            daemon=True,
+        )
+        for worker, (queue, worker_seed) in enumerate(
+            zip(queues, seed_sequence.spawn(workers))
+        )
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for chunk_index in range(0, -(-n_posterior_samples // chunk_size)):
+            worker = chunk_index % workers
+            yield _next_chunk(queues[worker], processes[worker], worker)
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
@@ -0,0 +1,127 @@
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from typing import NamedTuple
+
+import numpy as np
+
+from gfs.app.bayes import Model, update_prior
+from gfs.app.elements import DataPoint
+from gfs.metrics import peak_rss_bytes
+from gfs.sample.algebra import multiply
+from gfs.sample.prune import FixedRange
+from gfs.sample.tree import Tree
+
+logger = logging.getLogger(__name__)
+
+MULTIPLY_REPEAT = 3
+
+SCALE_PARAMETERS = ("bit_depth", "leaf_bit_depth_range", "n_data_points")
+
+SCALE_METRICS = (
+    "n_leaves",
+    "max_multiplicity_bits",
+    "peak_rss_bytes",
+    "multiply_seconds",
+    "samples_per_second",
+)
+
+
+class ScaleStep(NamedTuple):
+    bit_depth: int
+    leaf_bit_depth_range: int
+    n_data_points: int
+    n_leaves: int
+    max_multiplicity_bits: int
+    peak_rss_bytes: int
+    update_seconds: float
+    multiply_seconds: float
+    samples_per_second: float
+
+
+class GrowthExponent(NamedTuple):
+    metric: str
+    parameter: str
+    exponent: float
+
+
+def measure_step(
+    model: Model, data: list[DataPoint], leaf_bit_depth_range: int, n_samples: int
+) -> ScaleStep:
+    if len(data) == 0:
+        raise ValueError("Scale report needs at least one data point.")
+
+    start = time.perf_counter()
+    posterior = update_prior(
+        prior=model.prior,
+        likelihood=model.likelihood,
+        data=data,
+        pruning=FixedRange(leaf_bit_depth_range),
+    )
+    update_seconds = time.perf_counter() - start
+
+    likelihood_leaves = model.likelihood.leaves(datum=data[-1])
+    multiply_timings: list[float] = list()
+    for _ in range(0, MULTIPLY_REPEAT):
+        start = time.perf_counter()
+        multiply(likelihood_leaves, posterior, FixedRange(leaf_bit_depth_range))
+        multiply_timings.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    Tree(leaves=posterior).sample(n_samples=n_samples, rng=np.random.default_rng(0))
+    sample_seconds = time.perf_counter() - start
+
+    return ScaleStep(
+        bit_depth=model.param_domain.bit_depth,
+        leaf_bit_depth_range=leaf_bit_depth_range,
+        n_data_points=len(data),
+        n_leaves=len(posterior),
+        max_multiplicity_bits=int(posterior.multiplicity.max()).bit_length(),
+        peak_rss_bytes=peak_rss_bytes(),
+        update_seconds=update_seconds,
+        multiply_seconds=min(multiply_timings),
+        samples_per_second=n_samples / sample_seconds,
+    )
+
+
+def scale_report(
+    models: list[Model],
+    data: list[DataPoint],
+    leaf_bit_depth_ranges: list[int],
+    data_sizes: list[int],
+    n_samples: int,
+) -> list[ScaleStep]:
+    steps: list[ScaleStep] = list()
+    # A fresh worker per step, so that peak RSS is measured for that step alone.
+    with ProcessPoolExecutor(max_workers=1, max_tasks_per_child=1) as executor:
+        for model, leaf_bit_depth_range, data_size in product(
+            models, leaf_bit_depth_ranges, data_sizes
+        ):
+            step = executor.submit(
+                measure_step, model, data[:data_size], leaf_bit_depth_range, n_samples
+            ).result()
+            logger.info(f"Scale step: {step}")
+            steps.append(step)
+    return steps
+
+
+def growth_exponents(steps: list[ScaleStep]) -> list[GrowthExponent]:
+    varying = [
+        parameter
+        for parameter in SCALE_PARAMETERS
+        if len({getattr(step, parameter) for step in steps}) > 1
+    ]
+    exponents: list[GrowthExponent] = list()
+    for metric in SCALE_METRICS:
+        rows = [[getattr(step, name) for name in varying + [metric]] for step in steps]
+        rows = [row for row in rows if min(row) > 0]
+        if len(rows) <= len(varying):
+            continue
+        log_rows = np.log(np.array(rows, dtype=float))
+        design = np.column_stack([np.ones(len(rows)), log_rows[:, :-1]])
+        coefficients, *_ = np.linalg.lstsq(design, log_rows[:, -1], rcond=None)
+        for parameter, exponent in zip(varying, coefficients[1:].tolist()):
+            exponents.append(GrowthExponent(metric, parameter, exponent))
+            logger.info(f"Growth exponent of {metric} in {parameter}: {exponent:.3f}")
+    return exponents
@@ -17,3 +17,22 @@ VERSION = "0.1.0"
 DIRECTORY_PROJECT_ROOT = "src/gfs/projects"
 
 LEAF_BIT_DEPTH_RANGE = 10
+
+LIKELIHOOD_BIT_DEPTH_RANGE = 20
+
+CACHE_MAX_BYTES = 1 << 30
+
+
+def get_cache_dir() -> str | None:
+    return os.getenv("GFS_CACHE_DIR") or None
+
+
+UPDATE_BATCH_SIZE = 1 << 14
+
+SAMPLES_CHUNK_SIZE = 1 << 20
+
+EXPORT_QUEUE_SIZE = 4
+
+PREDICT_CHUNK_SIZE = 1 << 24
+
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
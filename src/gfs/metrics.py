@@ -0,0 +1,184 @@
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import wraps
+from typing import Any, Callable, Iterator, ParamSpec, TypeVar
+
+import numpy as np
+
+from gfs.sample.leaf import LeafList
+
+METRICS_VERSION = 1
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+
+def peak_rss_bytes() -> int:
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+class Metrics:
+    def __init__(self, command: str, project: str) -> None:
+        self.command = command
+        self.project = project
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self.stages: dict[str, dict[str, float]] = dict()
+        self.leaves: list[dict[str, Any]] = list()
+        self.reductions: dict[str, dict[str, int]] = dict()
+        self.pruning: dict[str, float] = {
+            "count": 0,
+            "leaves_before": 0,
+            "leaves_after": 0,
+            "dropped_mass": 0.0,
+            "max_dropped_mass": 0.0,
+        }
+        self._start_wall = time.perf_counter()
+        self._start_cpu = time.process_time()
+
+    def add_stage(self, name: str, wall_seconds: float, cpu_seconds: float) -> None:
+        stage = self.stages.setdefault(
+            name,
+            {
+                "count": 0,
+                "wall_seconds": 0.0,
+                "cpu_seconds": 0.0,
+                "max_wall_seconds": 0.0,
+                "peak_rss_bytes": 0,
+            },
+        )
+        stage["count"] += 1
+        stage["wall_seconds"] += wall_seconds
+        stage["cpu_seconds"] += cpu_seconds
+        stage["max_wall_seconds"] = max(stage["max_wall_seconds"], wall_seconds)
+        stage["peak_rss_bytes"] = max(stage["peak_rss_bytes"], peak_rss_bytes())
+
+    def add_leaves(self, name: str, leaves: LeafList) -> None:
+        bit_depths, counts = np.unique(leaves.bit_depth, return_counts=True)
+        self.leaves.append(
+            {
+                "stage": name,
+                "n_leaves": len(leaves),
+                "max_multiplicity": int(leaves.multiplicity.max(initial=0)),
+                "bit_depth_histogram": dict(
+                    zip(map(str, bit_depths.tolist()), counts.tolist())
+                ),
+            }
+        )
+
+    def add_reduction(self, name: str, n_before: int, n_after: int) -> None:
+        reduction = self.reductions.setdefault(
+            name, {"count": 0, "leaves_before": 0, "leaves_after": 0}
+        )
+        reduction["count"] += 1
+        reduction["leaves_before"] += n_before
+        reduction["leaves_after"] += n_after
+
+    def add_pruning(self, n_before: int, n_after: int, dropped_mass: float) -> None:
+        self.add_pruning_totals(1, n_before, n_after, dropped_mass, dropped_mass)
+
+    def add_pruning_totals(
+        self,
+        count: int,
+        n_before: int,
+        n_after: int,
+        dropped_mass: float,
+        max_dropped_mass: float,
+    ) -> None:
+        self.pruning["count"] += count
+        self.pruning["leaves_before"] += n_before
+        self.pruning["leaves_after"] += n_after
+        self.pruning["dropped_mass"] += dropped_mass
+        self.pruning["max_dropped_mass"] = max(
+            self.pruning["max_dropped_mass"], max_dropped_mass
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "version": METRICS_VERSION,
+            "command": self.command,
+            "project": self.project,
+            "started_at": self.started_at,
+            "wall_seconds": time.perf_counter() - self._start_wall,
+            "cpu_seconds": time.process_time() - self._start_cpu,
+            "peak_rss_bytes": peak_rss_bytes(),
+            "stages": self.stages,
+            "leaves": self.leaves,
+            "reductions": self.reductions,
+            "pruning": self.pruning,
+        }
+
+
+_metrics: Metrics | None = None
+
+
+def enable(command: str, project: str) -> Metrics:
+    global _metrics
+    _metrics = Metrics(command=command, project=project)
+    return _metrics
+
+
+def disable() -> None:
+    global _metrics
+    _metrics = None
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    if _metrics is None:
+        yield
+        return
+    metrics = _metrics
+    start_wall = time.perf_counter()
+    start_cpu = time.process_time()
+    try:
+        yield
+    finally:
+        metrics.add_stage(
+            name,
+            wall_seconds=time.perf_counter() - start_wall,
+            cpu_seconds=time.process_time() - start_cpu,
+        )
+
+
+def timed(name: str) -> Callable[[Callable[P, R]], Callable[P, R]]:
+    def decorator(func: Callable[P, R]) -> Callable[P, R]:
+        @wraps(func)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            with stage(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def record_reduction(name: str, n_before: int, n_after: int) -> None:
+    if _metrics is not None:
+        _metrics.add_reduction(name, n_before, n_after)
+
+
+def record_pruning(n_before: int, n_after: int, dropped_mass: float) -> None:
+    if _metrics is not None:
+        _metrics.add_pruning(n_before, n_after, dropped_mass)
+
+
+def record_pruning_totals(
+    count: int,
+    n_before: int,
+    n_after: int,
+    dropped_mass: float,
+    max_dropped_mass: float,
+) -> None:
+    if _metrics is not None:
+        _metrics.add_pruning_totals(
+            count, n_before, n_after, dropped_mass, max_dropped_mass
+        )
+
+
+def record_leaves(name: str, leaves: LeafList) -> None:
+    if _metrics is not None:
+        _metrics.add_leaves(name, leaves)
@@ -1,9 +1,11 @@
+import numpy as np
+
 from gfs.app.bayes import Likelihood, Model, Prior
 from gfs.app.domain import Axis, Domain
 from gfs.app.elements import DataPoint, Distribution, Parameter, XDataPoint, YDataPoint
 from gfs.app.project import Preprocessor
 from gfs.sample.functions import constant, linear
-from gfs.sample.leaf import LeafList
+from gfs.sample.leaf import LeafList, Side
 
 
 class BinomialPreprocessor(Preprocessor):
@@ -49,3 +51,20 @@ class BinomialModel(Model):
     def dist(self, param: Parameter, x: XDataPoint | None = None) -> Distribution:
         bias_towards_heads = param[0]
         return Distribution([1 - bias_towards_heads, bias_towards_heads])
+
+    def dist_batch(self, params: np.ndarray, xs: list[XDataPoint | None]) -> np.ndarray:
+        bias_towards_heads = params[:, 0]
+        dists = np.stack([1 - bias_towards_heads, bias_towards_heads], axis=-1)
+        return np.broadcast_to(dists, (len(xs), *dists.shape))
+
+    def expected_dist_over_box(
+        self, sides: list[Side], x: XDataPoint | None = None
+    ) -> Distribution:
+        center = [side.endpoint + ((1 << side.bit_depth) - 1) / 2 for side in sides]
+        return self.dist(Parameter(self.param_domain.scale(tuple(center))), x)
+
+    def expected_dist_over_boxes(
+        self, leaves: LeafList, xs: list[XDataPoint | None]
+    ) -> np.ndarray:
+        centers = leaves.endpoints + (np.left_shift(1, leaves.side_bit_depths) - 1) / 2
+        return self.dist_batch(self.param_domain.scale_array(centers), xs)
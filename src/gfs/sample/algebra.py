@@ -1,12 +1,21 @@
 from itertools import product
 
+import numpy as np
+
+from gfs.metrics import record_leaves, record_reduction, stage, timed
+from gfs.sample.index import IntervalIndex
 from gfs.sample.leaf import (
+    INT_DTYPE,
     Leaf,
     LeafList,
     Side,
+    coarsen,
     combine_on_multiplicity,
     reduce_multiplicity,
 )
+from gfs.sample.prune import Pruning
+
+BRUTE_FORCE_MAX_PAIRS = 1 << 13
 
 
 def _line_segment_to_list_of_sides(endpoint: int, length: int) -> list[Side]:
@@ -49,16 +58,171 @@ def _intersect_leaves(l1: Leaf, l2: Leaf) -> list[Leaf]:
     return leaves
 
 
+def _segments_to_sides(
+    left: np.ndarray, length: np.ndarray
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    segment_ids: list[np.ndarray] = list()
+    endpoints: list[np.ndarray] = list()
+    bit_depths: list[np.ndarray] = list()
+    max_length = int(length.max()) if len(length) > 0 else 0
+    for i in range(0, max_length.bit_length()):
+        has_side = ((length >> i) & 1).astype(bool)
+        segment_ids.append(np.flatnonzero(has_side))
+        endpoints.append(left[has_side] + (length[has_side] & ((1 << i) - 1)))
+        bit_depths.append(np.full(has_side.sum(), i, dtype=INT_DTYPE))
+
+    if len(segment_ids) == 0:
+        empty = np.empty(0, dtype=INT_DTYPE)
+        return empty, empty, empty
+    segment_id = np.concatenate(segment_ids)
+    order = np.argsort(segment_id, kind="stable")
+    return (
+        segment_id[order],
+        np.concatenate(endpoints)[order],
+        np.concatenate(bit_depths)[order],
+    )
+
+
+def _intersect_pairs(
+    leaves_left: LeafList,
+    leaves_right: LeafList,
+    index_left: np.ndarray,
+    index_right: np.ndarray,
+) -> LeafList:
+    endpoints_left = leaves_left.endpoints[index_left]
+    endpoints_right = leaves_right.endpoints[index_right]
+    left = np.maximum(endpoints_left, endpoints_right)
+    right = np.minimum(
+        endpoints_left + (1 << leaves_left.side_bit_depths[index_left]),
+        endpoints_right + (1 << leaves_right.side_bit_depths[index_right]),
+    )
+    length = right - left
+
+    overlapping = np.all(length > 0, axis=1)
+    left = left[overlapping]
+    length = length[overlapping]
+    multiplicity_left = leaves_left.multiplicity[index_left[overlapping]]
+    multiplicity_right = leaves_right.multiplicity[index_right[overlapping]]
+    multiplicity = multiplicity_left + multiplicity_right
+
+    n_pairs = len(multiplicity)
+    rows = np.arange(n_pairs)
+    endpoints = np.empty((n_pairs, 0), dtype=INT_DTYPE)
+    side_bit_depths = np.empty((n_pairs, 0), dtype=INT_DTYPE)
+    for axis in range(0, leaves_left.n_axes):
+        pair, endpoint, bit_depth = _segments_to_sides(left[:, axis], length[:, axis])
+        n_sides = np.bincount(pair, minlength=n_pairs)
+        first_side = np.cumsum(n_sides) - n_sides
+
+        repeats = n_sides[rows]
+        expanded = np.repeat(np.arange(len(rows)), repeats)
+        offset = np.arange(len(expanded)) - np.repeat(
+            np.cumsum(repeats) - repeats, repeats
+        )
+        side = first_side[rows[expanded]] + offset
+
+        rows = rows[expanded]
+        endpoints = np.column_stack([endpoints[expanded], endpoint[side]])
+        side_bit_depths = np.column_stack([side_bit_depths[expanded], bit_depth[side]])
+
+    return LeafList.from_arrays(multiplicity[rows], endpoints, side_bit_depths)
+
+
+def _all_pairs(
+    leaves_left: LeafList, leaves_right: LeafList
+) -> tuple[np.ndarray, np.ndarray]:
+    index_left = np.repeat(np.arange(len(leaves_left)), len(leaves_right))
+    index_right = np.tile(np.arange(len(leaves_right)), len(leaves_left))
+    return index_left, index_right
+
+
+def _overlapping_pairs(
+    leaves_left: LeafList, leaves_right: LeafList
+) -> tuple[np.ndarray, np.ndarray]:
+    if len(leaves_left) * len(leaves_right) <= BRUTE_FORCE_MAX_PAIRS:
+        return _all_pairs(leaves_left, leaves_right)
+    if len(leaves_left) < len(leaves_right):
+        return IntervalIndex(leaves_right).overlapping(leaves_left)
+    index_right, index_left = IntervalIndex(leaves_left).overlapping(leaves_right)
+    return index_left, index_right
+
+
+def _product_bit_depths(leaves: LeafList, reference: LeafList) -> np.ndarray:
+    index, index_reference = _overlapping_pairs(leaves, reference)
+    endpoints = leaves.endpoints[index]
+    reference_endpoints = reference.endpoints[index_reference]
+    left = np.maximum(endpoints, reference_endpoints)
+    right = np.minimum(
+        endpoints + (1 << leaves.side_bit_depths[index]),
+        reference_endpoints + (1 << reference.side_bit_depths[index_reference]),
+    )
+    length = right - left
+    overlapping = np.all(length > 0, axis=1)
+    index = index[overlapping]
+    multiplicity = leaves.multiplicity[index]
+    multiplicity += reference.multiplicity[index_reference[overlapping]]
+    pair_bit_depth = multiplicity + np.log2(length[overlapping]).sum(axis=1)
+
+    # The bit depth of each leaf's product with the whole reference, with -inf
+    # for leaves outside its support.
+    offset = pair_bit_depth.max(initial=0.0)
+    weights = np.zeros(len(leaves))
+    np.add.at(weights, index, np.exp2(pair_bit_depth - offset))
+    with np.errstate(divide="ignore"):
+        return np.log2(weights) + offset
+
+
+@timed("multiply")
 def multiply(
-    leaves_left: LeafList, leaves_right: LeafList, leaf_bit_depth_range: int
+    leaves_left: LeafList,
+    leaves_right: LeafList,
+    pruning: Pruning,
+    reference: LeafList | None = None,
 ) -> LeafList:
-    leaves = LeafList()
-    for l1, l2 in product(leaves_left, leaves_right):
-        leaves.extend(_intersect_leaves(l1, l2))
+    with stage("intersect"):
+        index_left, index_right = _overlapping_pairs(leaves_left, leaves_right)
+        leaves = _intersect_pairs(leaves_left, leaves_right, index_left, index_right)
 
-    leaves = combine_on_multiplicity(leaves)
-    max_bit_depth = max([leaf.bit_depth for leaf in leaves])
-    leaves.drop_small(bit_depth=max_bit_depth - leaf_bit_depth_range)
-    leaves = reduce_multiplicity(leaves)
+    with stage("combine"):
+        leaves = combine_on_multiplicity(leaves)
 
+    with stage("coarsen"):
+        n_leaves = len(leaves)
+        leaves = coarsen(leaves)
+        record_reduction("coarsen", n_leaves, len(leaves))
+
+    # A factor that will later be multiplied into the reference, such as a
+    # likelihood product into the prior, is pruned by what survives that product.
+    with stage("prune"):
+        if reference is None:
+            leaves = pruning.prune(leaves)
+        else:
+            leaves = pruning.prune_factor(
+                leaves, _product_bit_depths(leaves, reference)
+            )
+        leaves = reduce_multiplicity(leaves)
+
+    record_leaves("multiply", leaves)
     return leaves
+
+
+def multiply_powers(
+    factors: list[tuple[LeafList, int]],
+    pruning: Pruning,
+    reference: LeafList | None = None,
+) -> LeafList:
+    if len(factors) == 0 or any(exponent < 1 for _, exponent in factors):
+        raise ValueError("Factors must be non-empty with positive exponents.")
+
+    max_exponent = max(exponent for _, exponent in factors)
+    result: LeafList | None = None
+    for bit in reversed(range(0, max_exponent.bit_length())):
+        if result is not None:
+            result = multiply(result, result, pruning, reference)
+        for leaves, exponent in factors:
+            if (exponent >> bit) & 1:
+                if result is None:
+                    result = leaves
+                else:
+                    result = multiply(result, leaves, pruning, reference)
+    return result
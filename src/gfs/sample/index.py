@@ -0,0 +1,72 @@
+import numpy as np
+
+from gfs.sample.leaf import INT_DTYPE, LeafList
+
+
+def _expand_ranges(
+    starts: np.ndarray, stops: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    counts = stops - starts
+    owner = np.repeat(np.arange(len(counts)), counts)
+    offset = np.arange(len(owner)) - np.repeat(np.cumsum(counts) - counts, counts)
+    return owner, starts[owner] + offset
+
+
+class IntervalIndex:
+    def __init__(self, leaves: LeafList, axis: int = 0) -> None:
+        self._leaves = leaves
+        self._axis = axis
+        self._groups: list[tuple[int, np.ndarray, np.ndarray]] = self._build_groups()
+
+    @property
+    def leaves(self) -> LeafList:
+        return self._leaves
+
+    @property
+    def axis(self) -> int:
+        return self._axis
+
+    def _build_groups(self) -> list[tuple[int, np.ndarray, np.ndarray]]:
+        endpoints = self.leaves.endpoints[:, self.axis]
+        bit_depths = self.leaves.side_bit_depths[:, self.axis]
+        groups: list[tuple[int, np.ndarray, np.ndarray]] = list()
+        for bit_depth in np.unique(bit_depths).tolist():
+            members = np.flatnonzero(bit_depths == bit_depth)
+            order = np.argsort(endpoints[members], kind="stable")
+            groups.append((bit_depth, members[order], endpoints[members[order]]))
+        return groups
+
+    def overlapping(self, leaves: LeafList) -> tuple[np.ndarray, np.ndarray]:
+        query_left = leaves.endpoints[:, self.axis]
+        query_right = query_left + (1 << leaves.side_bit_depths[:, self.axis])
+
+        index_query: list[np.ndarray] = list()
+        index_indexed: list[np.ndarray] = list()
+        for bit_depth, members, sorted_endpoints in self._groups:
+            first = np.searchsorted(
+                sorted_endpoints, query_left - (1 << bit_depth), side="right"
+            )
+            last = np.searchsorted(sorted_endpoints, query_right, side="left")
+            owner, position = _expand_ranges(first, last)
+            index_query.append(owner)
+            index_indexed.append(members[position])
+
+        if len(index_query) == 0:
+            empty = np.empty(0, dtype=INT_DTYPE)
+            return empty, empty
+        index_query_all = np.concatenate(index_query)
+        index_indexed_all = np.concatenate(index_indexed)
+
+        overlap = np.ones(len(index_query_all), dtype=bool)
+        for axis in range(0, leaves.n_axes):
+            if axis == self.axis:
+                continue
+            left_1 = leaves.endpoints[index_query_all, axis]
+            left_2 = self.leaves.endpoints[index_indexed_all, axis]
+            right_1 = left_1 + (1 << leaves.side_bit_depths[index_query_all, axis])
+            right_2 = left_2 + (
+                1 << self.leaves.side_bit_depths[index_indexed_all, axis]
+            )
+            overlap &= (left_1 < right_2) & (left_2 < right_1)
+
+        return index_query_all[overlap], index_indexed_all[overlap]
@@ -1,7 +1,13 @@
-from typing import NamedTuple, Self
+from typing import Iterable, Iterator, NamedTuple, Self
+
+import numpy as np
 
 MAX_COMBINE_ATTEMPTS = 100
 
+MAX_COARSEN_PASSES = 64
+
+INT_DTYPE = np.int64
+
 
 class Label(NamedTuple):
     value: int
@@ -52,61 +58,318 @@ class Leaf(NamedTuple):
         return tuple(coordinate_list)
 
 
-class LeafList(list[Leaf]):
+def _as_column(values: np.ndarray | Iterable[int]) -> np.ndarray:
+    return np.ascontiguousarray(values, dtype=INT_DTYPE).reshape(-1)
+
+
+def _as_matrix(values: np.ndarray | Iterable[Iterable[int]], n_rows: int) -> np.ndarray:
+    matrix = np.ascontiguousarray(values, dtype=INT_DTYPE)
+    if matrix.ndim == 2:
+        return matrix
+    return matrix.reshape(n_rows, -1) if n_rows > 0 else matrix.reshape(0, 0)
+
+
+def _compact(array: np.ndarray) -> np.ndarray:
+    if array.size == 0:
+        return array.astype(np.int8)
+    min_type = np.min_scalar_type(array.min())
+    max_type = np.min_scalar_type(array.max())
+    return array.astype(np.result_type(min_type, max_type))
+
+
+class LeafList:
+    def __init__(self, leaves: Iterable[Leaf] = ()) -> None:
+        if isinstance(leaves, LeafList):
+            self._set_arrays(
+                leaves.multiplicity.copy(),
+                leaves.endpoints.copy(),
+                leaves.side_bit_depths.copy(),
+            )
+            return
+
+        leaves = list(leaves)
+        n_axes = len(leaves[0].sides) if len(leaves) > 0 else 0
+        if any(len(leaf.sides) != n_axes for leaf in leaves):
+            raise ValueError("All leaves must have the same number of sides.")
+        self._set_arrays(
+            np.fromiter(
+                (leaf.multiplicity for leaf in leaves), INT_DTYPE, count=len(leaves)
+            ),
+            np.array(
+                [[side.endpoint for side in leaf.sides] for leaf in leaves],
+                dtype=INT_DTYPE,
+            ).reshape(len(leaves), n_axes),
+            np.array(
+                [[side.bit_depth for side in leaf.sides] for leaf in leaves],
+                dtype=INT_DTYPE,
+            ).reshape(len(leaves), n_axes),
+        )
+
+    @classmethod
+    def from_arrays(
+        cls,
+        multiplicity: np.ndarray | Iterable[int],
+        endpoints: np.ndarray | Iterable[Iterable[int]],
+        side_bit_depths: np.ndarray | Iterable[Iterable[int]],
+    ) -> Self:
+        leaves = cls.__new__(cls)
+        multiplicity = _as_column(multiplicity)
+        n_leaves = len(multiplicity)
+        leaves._set_arrays(
+            multiplicity,
+            _as_matrix(endpoints, n_leaves),
+            _as_matrix(side_bit_depths, n_leaves),
+        )
+        return leaves
+
+    def _set_arrays(
+        self,
+        multiplicity: np.ndarray,
+        endpoints: np.ndarray,
+        side_bit_depths: np.ndarray,
+    ) -> None:
+        if endpoints.shape != side_bit_depths.shape or endpoints.shape[0] != len(
+            multiplicity
+        ):
+            raise ValueError("Leaf arrays have inconsistent shapes.")
+        self._multiplicity = multiplicity
+        self._endpoints = endpoints
+        self._side_bit_depths = side_bit_depths
+
+    def __getstate__(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        return (
+            _compact(self._multiplicity),
+            _compact(self._endpoints),
+            _compact(self._side_bit_depths),
+        )
+
+    def __setstate__(self, state: tuple[np.ndarray, np.ndarray, np.ndarray]) -> None:
+        multiplicity, endpoints, side_bit_depths = state
+        self._set_arrays(
+            multiplicity.astype(INT_DTYPE),
+            endpoints.astype(INT_DTYPE),
+            side_bit_depths.astype(INT_DTYPE),
+        )
+
+    @property
+    def multiplicity(self) -> np.ndarray:
+        return self._multiplicity
+
+    @property
+    def endpoints(self) -> np.ndarray:
+        return self._endpoints
+
+    @property
+    def side_bit_depths(self) -> np.ndarray:
+        return self._side_bit_depths
+
+    @property
+    def n_axes(self) -> int:
+        return self._endpoints.shape[1]
+
+    @property
+    def bit_depth(self) -> np.ndarray:
+        return self._side_bit_depths.sum(axis=1) + self._multiplicity
+
+    @property
+    def n_blocks(self) -> int:
+        bit_depths, counts = np.unique(self.bit_depth, return_counts=True)
+        return sum(
+            [
+                count << bit_depth
+                for bit_depth, count in zip(bit_depths.tolist(), counts.tolist())
+            ]
+        )
+
+    @property
+    def nbytes(self) -> int:
+        arrays = [self._multiplicity, self._endpoints, self._side_bit_depths]
+        return sum([array.nbytes for array in arrays])
+
+    def __len__(self) -> int:
+        return len(self._multiplicity)
+
+    def __iter__(self) -> Iterator[Leaf]:
+        for multiplicity, endpoints, bit_depths in zip(
+            self._multiplicity.tolist(),
+            self._endpoints.tolist(),
+            self._side_bit_depths.tolist(),
+        ):
+            yield Leaf(
+                multiplicity=multiplicity,
+                sides=[Side(e, b) for e, b in zip(endpoints, bit_depths)],
+            )
+
+    def __getitem__(self, i: int) -> Leaf:
+        sides = [
+            Side(e, b)
+            for e, b in zip(
+                self._endpoints[i].tolist(), self._side_bit_depths[i].tolist()
+            )
+        ]
+        return Leaf(multiplicity=int(self._multiplicity[i]), sides=sides)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, LeafList):
+            return NotImplemented
+        return all(
+            [
+                np.array_equal(self._multiplicity, other.multiplicity),
+                np.array_equal(self._endpoints, other.endpoints),
+                np.array_equal(self._side_bit_depths, other.side_bit_depths),
+            ]
+        )
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({list(self)})"
+
+    def take(self, indices: np.ndarray) -> Self:
+        return self.from_arrays(
+            self._multiplicity[indices],
+            self._endpoints[indices],
+            self._side_bit_depths[indices],
+        )
+
+    def append(self, leaf: Leaf) -> None:
+        self.extend([leaf])
+
+    def extend(self, leaves: Iterable[Leaf]) -> None:
+        other = leaves if isinstance(leaves, LeafList) else LeafList(leaves)
+        if len(other) == 0:
+            return
+        if len(self) == 0:
+            self._set_arrays(
+                other.multiplicity.copy(),
+                other.endpoints.copy(),
+                other.side_bit_depths.copy(),
+            )
+            return
+        self._set_arrays(
+            np.concatenate([self._multiplicity, other.multiplicity]),
+            np.concatenate([self._endpoints, other.endpoints]),
+            np.concatenate([self._side_bit_depths, other.side_bit_depths]),
+        )
+
     def extend_domain(self, bit_depth: int, axis: int | None = None) -> None:
         if axis is None:
-            axis = len(self)
-        for leaf in self:
-            leaf.sides.insert(axis, Side(endpoint=0, bit_depth=bit_depth))
+            axis = self.n_axes
+        self._set_arrays(
+            self._multiplicity,
+            np.insert(self._endpoints, axis, 0, axis=1),
+            np.insert(self._side_bit_depths, axis, bit_depth, axis=1),
+        )
 
     def restrict(self, value: int, axis: int) -> None:
-        to_pop: list[int] = list()
-        for i, leaf in enumerate(self):
-            side = leaf.sides[axis]
-            if value in range(side.endpoint, side.endpoint + (1 << side.bit_depth)):
-                _ = leaf.sides.pop(axis)
-            else:
-                to_pop.append(i)
-
-        to_pop.reverse()
-        for i in to_pop:
-            _ = self.pop(i)
+        endpoint = self._endpoints[:, axis]
+        length = np.left_shift(1, self._side_bit_depths[:, axis])
+        keep = (endpoint <= value) & (value < endpoint + length)
+        self._set_arrays(
+            self._multiplicity[keep],
+            np.delete(self._endpoints[keep], axis, axis=1),
+            np.delete(self._side_bit_depths[keep], axis, axis=1),
+        )
 
     def drop_small(self, bit_depth: int) -> None:
-        to_pop: list[int] = [
-            i for i in range(len(self)) if self[i].bit_depth <= bit_depth
-        ]
-        to_pop.reverse()
-        for i in to_pop:
-            _ = self.pop(i)
+        keep = self.bit_depth > bit_depth
+        self._set_arrays(
+            self._multiplicity[keep],
+            self._endpoints[keep],
+            self._side_bit_depths[keep],
+        )
 
 
 def reduce_multiplicity(leaves: LeafList) -> LeafList:
-    min_multiplicity: int = min([leaf.multiplicity for leaf in leaves])
-    return LeafList(
-        [Leaf(leaf.multiplicity - min_multiplicity, leaf.sides) for leaf in leaves]
+    if len(leaves) == 0:
+        return LeafList(leaves)
+
+    min_multiplicity = leaves.multiplicity.min()
+    return LeafList.from_arrays(
+        leaves.multiplicity - min_multiplicity,
+        leaves.endpoints,
+        leaves.side_bit_depths,
     )
 
 
 def combine_on_multiplicity(leaves: LeafList) -> LeafList:
-    to_increase: list[int] = list()
-    to_pop: list[int] = list()
-    for i, leaf_1 in enumerate(leaves):
-        if i in to_pop:
-            continue
-        for j, leaf_2 in enumerate(leaves[(i + 1) :]):
-            if leaf_1 == leaf_2:
-                to_increase.append(i)
-                to_pop.append(i + 1 + j)
-                break
-
-    combined_leaves: LeafList = LeafList()
-    for i, leaf in enumerate(leaves):
-        if i in to_pop:
-            continue
-        if i in to_increase:
-            combined_leaves.append(Leaf(leaf.multiplicity + 1, leaf.sides))
-            continue
-        combined_leaves.append(Leaf(leaf.multiplicity, leaf.sides))
-
-    return combined_leaves
+    if len(leaves) == 0:
+        return LeafList(leaves)
+
+    unique_sides, side_group = np.unique(
+        np.column_stack([leaves.endpoints, leaves.side_bit_depths]),
+        axis=0,
+        return_inverse=True,
+    )
+    group = side_group.reshape(-1)
+    multiplicity = leaves.multiplicity
+    for _ in range(0, MAX_COMBINE_ATTEMPTS):
+        min_multiplicity = multiplicity.min()
+        span = multiplicity.max() - min_multiplicity + 1
+        keys, counts = np.unique(
+            group * span + (multiplicity - min_multiplicity), return_counts=True
+        )
+        group = keys // span
+        multiplicity = keys % span + min_multiplicity
+        if counts.max() == 1:
+            return LeafList.from_arrays(
+                multiplicity,
+                unique_sides[group, : leaves.n_axes],
+                unique_sides[group, leaves.n_axes :],
+            )
+
+        carried_groups: list[np.ndarray] = list()
+        carried_multiplicities: list[np.ndarray] = list()
+        for bit in range(0, int(counts.max()).bit_length()):
+            has_bit = (counts >> bit) & 1 == 1
+            carried_groups.append(group[has_bit])
+            carried_multiplicities.append(multiplicity[has_bit] + bit)
+        group = np.concatenate(carried_groups)
+        multiplicity = np.concatenate(carried_multiplicities)
+
+    raise Exception("Maximum combine attempts exceeded.")
+
+
+def _merge_siblings(leaves: LeafList, axis: int) -> LeafList:
+    endpoint = leaves.endpoints[:, axis]
+    bit_depth = leaves.side_bit_depths[:, axis]
+    is_right = (endpoint >> bit_depth) & 1 == 1
+    parent_endpoints = leaves.endpoints.copy()
+    parent_endpoints[:, axis] -= np.where(is_right, 1 << bit_depth, 0)
+
+    keys = np.column_stack(
+        [leaves.multiplicity, parent_endpoints, leaves.side_bit_depths]
+    )
+    order = np.lexsort(keys.T[::-1])
+    same_as_next = np.all(keys[order[1:]] == keys[order[:-1]], axis=1)
+    same_as_previous = np.concatenate([[False], same_as_next[:-1]])
+    same_as_after_next = np.concatenate([same_as_next[1:], [False]])
+    is_pair = same_as_next & ~same_as_previous & ~same_as_after_next
+    is_pair &= is_right[order[:-1]] != is_right[order[1:]]
+    if not np.any(is_pair):
+        return leaves
+
+    first = order[:-1][is_pair]
+    second = order[1:][is_pair]
+    parent = np.where(is_right[first], second, first)
+    keep = np.ones(len(leaves), dtype=bool)
+    keep[np.where(is_right[first], first, second)] = False
+
+    side_bit_depths = leaves.side_bit_depths.copy()
+    side_bit_depths[parent, axis] += 1
+    return LeafList.from_arrays(
+        leaves.multiplicity[keep],
+        leaves.endpoints[keep],
+        side_bit_depths[keep],
+    )
+
+
+def coarsen(leaves: LeafList) -> LeafList:
+    if len(leaves) == 0:
+        return LeafList(leaves)
+
+    for _ in range(0, MAX_COARSEN_PASSES):
+        n_leaves = len(leaves)
+        for axis in range(0, leaves.n_axes):
+            leaves = _merge_siblings(leaves, axis)
+        if len(leaves) == n_leaves:
+            break
+    return leaves
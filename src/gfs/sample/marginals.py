@@ -0,0 +1,100 @@
+import numpy as np
+
+from gfs.sample.leaf import INT_DTYPE, LeafList
+
+MASS_TOLERANCE = 1e-12
+BIN_MASS_CHUNK_SIZE = 1 << 16
+
+
+def leaf_probabilities(leaves: LeafList) -> np.ndarray:
+    bit_depth = leaves.bit_depth
+    weights = np.exp2((bit_depth - bit_depth.max()).astype(float))
+    return weights / weights.sum()
+
+
+def bin_edges(axis_bit_depth: int, n_bins: int | None = None) -> np.ndarray:
+    n_cells = 1 << axis_bit_depth
+    n_bins = n_cells if n_bins is None else min(n_bins, n_cells)
+    if n_bins < 1:
+        raise ValueError("Number of bins must be positive.")
+    k = np.arange(0, n_bins + 1, dtype=INT_DTYPE)
+    return -(-k * n_cells // n_bins)
+
+
+def _fraction_below(leaves: LeafList, axis: int, points: np.ndarray) -> np.ndarray:
+    left = leaves.endpoints[:, axis, np.newaxis]
+    length = (1 << leaves.side_bit_depths[:, axis, np.newaxis]).astype(float)
+    return np.clip((points[np.newaxis, :] - left) / length, 0.0, 1.0)
+
+
+def _bin_overlaps(
+    leaves: LeafList, axis: int, edges: np.ndarray, leaf_index: np.ndarray
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    left = leaves.endpoints[leaf_index, axis]
+    right = left + (1 << leaves.side_bit_depths[leaf_index, axis])
+    first = np.searchsorted(edges, left, side="right") - 1
+    n_bins = np.searchsorted(edges, right, side="left") - first
+    row = np.repeat(np.arange(0, len(leaf_index)), n_bins)
+    offset = np.arange(0, len(row)) - np.repeat(np.cumsum(n_bins) - n_bins, n_bins)
+    bins = first[row] + offset
+    overlap = np.minimum(right[row], edges[bins + 1])
+    overlap -= np.maximum(left[row], edges[bins])
+    return row, bins, overlap / (right - left)[row]
+
+
+def _bin_mass(leaves: LeafList, axes: list[int], edges: list[np.ndarray]) -> np.ndarray:
+    # Each leaf spreads its probability over the bins it overlaps, in proportion
+    # to the overlap on every axis. A leaf only touches the bins around it, so
+    # the work is linear in the number of leaves for a fixed number of bins.
+    mass = np.zeros([len(axis_edges) - 1 for axis_edges in edges])
+    probabilities = leaf_probabilities(leaves)
+    for start in range(0, len(leaves), BIN_MASS_CHUNK_SIZE):
+        leaf_index = np.arange(start, min(start + BIN_MASS_CHUNK_SIZE, len(leaves)))
+        weights = probabilities[leaf_index]
+        bins: list[np.ndarray] = list()
+        for axis, axis_edges in zip(axes, edges):
+            row, axis_bins, fraction = _bin_overlaps(
+                leaves, axis, axis_edges, leaf_index
+            )
+            leaf_index = leaf_index[row]
+            weights = weights[row] * fraction
+            bins = [previous[row] for previous in bins] + [axis_bins]
+        np.add.at(mass, tuple(bins), weights)
+    return np.where(mass > MASS_TOLERANCE, mass, 0.0)
+
+
+def bin_mass(leaves: LeafList, edges: list[np.ndarray]) -> np.ndarray:
+    if len(edges) != leaves.n_axes:
+        raise ValueError("Need one array of bin edges per axis.")
+    return _bin_mass(leaves, list(range(0, leaves.n_axes)), edges)
+
+
+def marginal_mass(leaves: LeafList, axis: int, edges: np.ndarray) -> np.ndarray:
+    return _bin_mass(leaves, [axis], [edges])
+
+
+def moments(leaves: LeafList) -> tuple[np.ndarray, np.ndarray]:
+    probabilities = leaf_probabilities(leaves)[:, np.newaxis]
+    length = (1 << leaves.side_bit_depths).astype(float)
+    leaf_means = leaves.endpoints + (length - 1) / 2
+    leaf_variances = (length**2 - 1) / 12
+    mean = (probabilities * leaf_means).sum(axis=0)
+    second_moment = (probabilities * (leaf_variances + leaf_means**2)).sum(axis=0)
+    return mean, second_moment - mean**2
+
+
+def quantiles(
+    leaves: LeafList, axis: int, levels: list[float], axis_bit_depth: int
+) -> np.ndarray:
+    probabilities = leaf_probabilities(leaves)
+    targets = np.asarray(levels, dtype=float)
+    low = np.zeros(len(targets), dtype=INT_DTYPE)
+    high = np.full(len(targets), (1 << axis_bit_depth) - 1, dtype=INT_DTYPE)
+    while np.any(low < high):
+        middle = (low + high) // 2
+        cumulative = probabilities @ _fraction_below(leaves, axis, middle + 1)
+        reached = cumulative >= targets
+        searching = low < high
+        high = np.where(searching & reached, middle, high)
+        low = np.where(searching & ~reached, middle + 1, low)
+    return low
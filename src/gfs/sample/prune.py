@@ -0,0 +1,181 @@
+import logging
+from abc import ABC, abstractmethod
+from typing import Callable
+
+import numpy as np
+
+from gfs.constants import LEAF_BIT_DEPTH_RANGE, LIKELIHOOD_BIT_DEPTH_RANGE
+from gfs.metrics import record_pruning, record_pruning_totals
+from gfs.sample.leaf import LeafList
+from gfs.sample.marginals import leaf_probabilities
+
+logger = logging.getLogger(__name__)
+
+
+class Pruning(ABC):
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.n_steps = 0
+        self.leaves_before = 0
+        self.dropped_leaves = 0
+        self.dropped_mass = 0.0
+        self.max_dropped_mass = 0.0
+
+    @abstractmethod
+    def keep(self, bit_depth: np.ndarray, probabilities: np.ndarray) -> np.ndarray:
+        pass
+
+    def keep_factor(
+        self, bit_depth: np.ndarray, probabilities: np.ndarray
+    ) -> np.ndarray:
+        return self.keep(bit_depth, probabilities)
+
+    def prune(self, leaves: LeafList) -> LeafList:
+        if len(leaves) == 0:
+            return leaves
+        return self._prune(
+            leaves, self.keep, leaves.bit_depth, leaf_probabilities(leaves)
+        )
+
+    def prune_factor(self, leaves: LeafList, product_bit_depth: np.ndarray) -> LeafList:
+        if len(leaves) == 0:
+            return leaves
+        probabilities = np.zeros(len(leaves))
+        finite = np.isfinite(product_bit_depth)
+        if np.any(finite):
+            weights = np.exp2(
+                product_bit_depth[finite] - product_bit_depth[finite].max()
+            )
+            probabilities[finite] = weights / weights.sum()
+        return self._prune(leaves, self.keep_factor, product_bit_depth, probabilities)
+
+    def _prune(
+        self,
+        leaves: LeafList,
+        keep_function: Callable[[np.ndarray, np.ndarray], np.ndarray],
+        bit_depth: np.ndarray,
+        probabilities: np.ndarray,
+    ) -> LeafList:
+        # Leaves too small for a float64 weight can never be sampled.
+        keep = keep_function(bit_depth, probabilities) & (probabilities > 0)
+        n_dropped = len(leaves) - int(keep.sum())
+        dropped_mass = float(probabilities[~keep].sum())
+        self.n_steps += 1
+        self.leaves_before += len(leaves)
+        self.dropped_leaves += n_dropped
+        self.dropped_mass += dropped_mass
+        self.max_dropped_mass = max(self.max_dropped_mass, dropped_mass)
+        record_pruning(len(leaves), len(leaves) - n_dropped, dropped_mass)
+        logger.debug(
+            f"Pruned {n_dropped} of {len(leaves)} leaves, mass {dropped_mass:.3g} "
+            f"(total {self.dropped_mass:.3g} over {self.n_steps} steps)"
+        )
+        if n_dropped == 0:
+            return leaves
+        return leaves.take(np.flatnonzero(keep))
+
+    def merge(self, other: "Pruning") -> None:
+        self.n_steps += other.n_steps
+        self.leaves_before += other.leaves_before
+        self.dropped_leaves += other.dropped_leaves
+        self.dropped_mass += other.dropped_mass
+        self.max_dropped_mass = max(self.max_dropped_mass, other.max_dropped_mass)
+        record_pruning_totals(
+            other.n_steps,
+            other.leaves_before,
+            other.leaves_before - other.dropped_leaves,
+            other.dropped_mass,
+            other.max_dropped_mass,
+        )
+
+
+class FixedRange(Pruning):
+    def __init__(
+        self,
+        leaf_bit_depth_range: int = LEAF_BIT_DEPTH_RANGE,
+        likelihood_bit_depth_range: int = LIKELIHOOD_BIT_DEPTH_RANGE,
+    ) -> None:
+        super().__init__()
+        self.leaf_bit_depth_range = leaf_bit_depth_range
+        self.likelihood_bit_depth_range = likelihood_bit_depth_range
+
+    def __repr__(self) -> str:
+        return (
+            f"FixedRange(leaf_bit_depth_range={self.leaf_bit_depth_range}, "
+            f"likelihood_bit_depth_range={self.likelihood_bit_depth_range})"
+        )
+
+    def keep(self, bit_depth: np.ndarray, probabilities: np.ndarray) -> np.ndarray:
+        return bit_depth > bit_depth.max() - self.leaf_bit_depth_range
+
+    def keep_factor(
+        self, bit_depth: np.ndarray, probabilities: np.ndarray
+    ) -> np.ndarray:
+        return bit_depth > bit_depth.max() - self.likelihood_bit_depth_range
+
+
+class MassBudget(Pruning):
+    def __init__(self, epsilon: float) -> None:
+        if not 0 <= epsilon < 1:
+            raise ValueError("Pruning epsilon must be in [0, 1).")
+        super().__init__()
+        self.epsilon = epsilon
+
+    def __repr__(self) -> str:
+        return f"MassBudget(epsilon={self.epsilon})"
+
+    def keep(self, bit_depth: np.ndarray, probabilities: np.ndarray) -> np.ndarray:
+        # Dropping mass m moves the distribution by m in total variation.
+        order = np.argsort(bit_depth, kind="stable")
+        cumulative = np.cumsum(probabilities[order])
+        n_dropped = min(
+            int(np.searchsorted(cumulative, self.epsilon, side="right")),
+            len(bit_depth) - 1,
+        )
+        keep = np.ones(len(bit_depth), dtype=bool)
+        keep[order[:n_dropped]] = False
+        return keep
+
+
+class LeafCap(Pruning):
+    def __init__(self, max_leaves: int) -> None:
+        if max_leaves < 1:
+            raise ValueError("Maximum number of leaves must be positive.")
+        super().__init__()
+        self.max_leaves = max_leaves
+
+    def __repr__(self) -> str:
+        return f"LeafCap(max_leaves={self.max_leaves})"
+
+    def keep(self, bit_depth: np.ndarray, probabilities: np.ndarray) -> np.ndarray:
+        if len(bit_depth) <= self.max_leaves:
+            return np.ones(len(bit_depth), dtype=bool)
+        order = np.argsort(-bit_depth, kind="stable")
+        keep = np.zeros(len(bit_depth), dtype=bool)
+        keep[order[: self.max_leaves]] = True
+        return keep
+
+
+PRUNING_POLICIES = ("range", "epsilon", "max_leaves")
+
+
+def make_pruning(
+    name: str,
+    leaf_bit_depth_range: int = LEAF_BIT_DEPTH_RANGE,
+    likelihood_bit_depth_range: int = LIKELIHOOD_BIT_DEPTH_RANGE,
+    epsilon: float | None = None,
+    max_leaves: int | None = None,
+) -> Pruning:
+    if name == "range":
+        return FixedRange(leaf_bit_depth_range, likelihood_bit_depth_range)
+    if name == "epsilon":
+        if epsilon is None:
+            raise ValueError("Pruning by epsilon needs pruning_epsilon to be set.")
+        return MassBudget(epsilon)
+    if name == "max_leaves":
+        if max_leaves is None:
+            raise ValueError("Pruning by max_leaves needs max_leaves to be set.")
+        return LeafCap(max_leaves)
+    raise ValueError(f"Unknown pruning policy: {name}. Use one of {PRUNING_POLICIES}.")
@@ -0,0 +1,109 @@
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+SAMPLING_STRATEGIES = ("iid", "stratified", "sobol")
+
+SOBOL_BITS = 52
+
+# Primitive polynomial degree, coefficients and initial direction numbers for
+# Sobol dimensions 2 and up, from Joe and Kuo (new-joe-kuo-6.21201).
+SOBOL_DIRECTIONS: list[tuple[int, int, list[int]]] = [
+    (1, 0, [1]),
+    (2, 1, [1, 3]),
+    (3, 1, [1, 3, 1]),
+    (3, 2, [1, 1, 1]),
+    (4, 1, [1, 1, 3, 3]),
+    (4, 4, [1, 3, 5, 13]),
+    (5, 2, [1, 1, 5, 5, 17]),
+    (5, 4, [1, 1, 5, 5, 5]),
+    (5, 7, [1, 1, 7, 11, 19]),
+    (5, 11, [1, 1, 5, 1, 1]),
+    (5, 13, [1, 1, 1, 3, 11]),
+    (5, 14, [1, 3, 5, 5, 31]),
+    (6, 1, [1, 3, 3, 9, 7, 49]),
+    (6, 13, [1, 1, 1, 15, 21, 21]),
+    (6, 16, [1, 3, 1, 13, 27, 49]),
+]
+
+SOBOL_MAX_DIMS = len(SOBOL_DIRECTIONS) + 1
+
+
+class UnitPoints(ABC):
+    def __init__(self, n_dims: int, rng: np.random.Generator) -> None:
+        self.n_dims = n_dims
+        self.rng = rng
+
+    @abstractmethod
+    def next(self, n_points: int) -> np.ndarray:
+        pass
+
+
+class IidPoints(UnitPoints):
+    def next(self, n_points: int) -> np.ndarray:
+        return self.rng.random(size=(n_points, self.n_dims))
+
+
+class StratifiedPoints(UnitPoints):
+    def next(self, n_points: int) -> np.ndarray:
+        strata = np.column_stack(
+            [self.rng.permutation(n_points) for _ in range(0, self.n_dims)]
+        )
+        return (strata + self.rng.random(size=(n_points, self.n_dims))) / n_points
+
+
+def _sobol_direction_numbers(n_dims: int) -> np.ndarray:
+    directions = np.zeros((n_dims, SOBOL_BITS), dtype=np.int64)
+    directions[0] = 1 << np.arange(SOBOL_BITS - 1, -1, -1, dtype=np.int64)
+    for dim, (degree, coefficients, initial) in enumerate(
+        SOBOL_DIRECTIONS[: n_dims - 1], start=1
+    ):
+        v = [m << (SOBOL_BITS - i) for i, m in enumerate(initial, start=1)]
+        for i in range(degree, SOBOL_BITS):
+            value = v[i - degree] ^ (v[i - degree] >> degree)
+            for k in range(1, degree):
+                if (coefficients >> (degree - 1 - k)) & 1:
+                    value ^= v[i - k]
+            v.append(value)
+        directions[dim] = v
+    return directions
+
+
+class SobolPoints(UnitPoints):
+    def __init__(self, n_dims: int, rng: np.random.Generator) -> None:
+        if n_dims > SOBOL_MAX_DIMS:
+            raise ValueError(f"Sobol points support at most {SOBOL_MAX_DIMS} axes.")
+        super().__init__(n_dims, rng)
+        self.directions = _sobol_direction_numbers(n_dims)
+        # A random digital shift keeps the estimator unbiased and seedable.
+        self.shift = rng.integers(0, 1 << SOBOL_BITS, size=n_dims, dtype=np.int64)
+        self.index = 0
+
+    def next(self, n_points: int) -> np.ndarray:
+        if n_points == 0:
+            return np.zeros((0, self.n_dims))
+        # Consecutive Gray-code points differ by one direction number, picked by
+        # the lowest set bit of the index, so the chunk is a running XOR.
+        first = self.index ^ (self.index >> 1)
+        steps = np.zeros((n_points, self.n_dims), dtype=np.int64)
+        steps[0] = self.shift
+        for bit in range(0, first.bit_length()):
+            if (first >> bit) & 1:
+                steps[0] ^= self.directions[:, bit]
+        index = np.arange(self.index + 1, self.index + n_points, dtype=np.int64)
+        lowest_bit = np.log2(index & -index).astype(np.int64)
+        steps[1:] = self.directions[:, lowest_bit].T
+        self.index += n_points
+        return np.bitwise_xor.accumulate(steps, axis=0) / float(1 << SOBOL_BITS)
+
+
+def make_points(strategy: str, n_dims: int, rng: np.random.Generator) -> UnitPoints:
+    if strategy == "iid":
+        return IidPoints(n_dims, rng)
+    if strategy == "stratified":
+        return StratifiedPoints(n_dims, rng)
+    if strategy == "sobol":
+        return SobolPoints(n_dims, rng)
+    raise ValueError(
+        f"Unknown sampling strategy: {strategy}. Use one of {SAMPLING_STRATEGIES}."
+    )
@@ -1,37 +1,82 @@
 from random import randrange
+from typing import Iterator, Self
 
-from gfs.sample.leaf import Label, Leaf, LeafList
+import numpy as np
+
+from gfs.constants import SAMPLES_CHUNK_SIZE
+from gfs.metrics import stage, timed
+from gfs.sample.leaf import INT_DTYPE, Label, Leaf, LeafList
+from gfs.sample.marginals import leaf_probabilities
+from gfs.sample.qmc import IidPoints, UnitPoints
 
 SAMPLING_MAX_RETRIES = 100000
 
 
 class Tree:
     def __init__(self, leaves: LeafList) -> None:
-        self._n_blocks: int = self._compute_n_blocks(leaves)
-        self._depth: int = self._compute_required_depth()
-        self._leaves_labeled: dict[Label, Leaf] = self._label_leaves(leaves)
-
+        with stage("tree_build"):
+            self._leaves: LeafList = self._sort_leaves(leaves)
+            self._cumulative_weights: np.ndarray = self._compute_cumulative_weights()
+        self._n_blocks: int | None = None
+        self._depth: int | None = None
+        self._leaves_labeled: dict[Label, Leaf] | None = None
+
+    @classmethod
+    def from_index(cls, leaves: LeafList, cumulative_weights: np.ndarray) -> Self:
+        if len(cumulative_weights) != len(leaves):
+            raise ValueError("Tree index arrays have inconsistent shapes.")
+        tree = cls.__new__(cls)
+        tree._leaves = leaves
+        tree._cumulative_weights = cumulative_weights
+        tree._n_blocks = None
+        tree._depth = None
+        tree._leaves_labeled = None
+        return tree
+
+    # The exact block count is an unbounded integer, so it is only computed
+    # for the labelled sampler. Sampling by weight uses float64 throughout.
     @property
     def n_blocks(self) -> int:
+        if self._n_blocks is None:
+            self._n_blocks = self._compute_n_blocks(self.leaves)
         return self._n_blocks
 
     @property
     def depth(self) -> int:
+        if self._depth is None:
+            self._depth = self._compute_required_depth()
         return self._depth
 
+    @property
+    def leaves(self) -> LeafList:
+        return self._leaves
+
+    @property
+    def cumulative_weights(self) -> np.ndarray:
+        return self._cumulative_weights
+
     @property
     def leaves_labeled(self) -> dict[Label, Leaf]:
+        if self._leaves_labeled is None:
+            self._leaves_labeled = self._label_leaves(self.leaves)
         return self._leaves_labeled
 
+    def _sort_leaves(self, leaves: LeafList) -> LeafList:
+        return leaves.take(np.argsort(-leaves.bit_depth, kind="stable"))
+
     def _compute_n_blocks(self, leaves: LeafList) -> int:
-        return sum([leaf.n_blocks for leaf in leaves])
+        return leaves.n_blocks
 
     def _compute_required_depth(self) -> int:
         return self.n_blocks.bit_length()
 
-    def _label_leaves(self, leaves: LeafList) -> dict[Label, Leaf]:
-        leaves.sort(key=lambda leaf: leaf.bit_depth, reverse=True)
+    def _compute_cumulative_weights(self) -> np.ndarray:
+        if len(self.leaves) == 0:
+            return np.zeros(0)
+        cumulative_weights = np.cumsum(leaf_probabilities(self.leaves))
+        return cumulative_weights / cumulative_weights[-1]
 
+    def _label_leaves(self, leaves: LeafList) -> dict[Label, Leaf]:
         leaves_labeled: dict[Label, Leaf] = dict()
         last_bit_depth_leaf: int = self.depth
         last_label: int = -1
@@ -57,5 +102,33 @@ class Tree:
 
         raise Exception("Maximum sampling retries exceeded.")
 
-    def sample(self, n_samples: int) -> list[tuple[int, ...]]:
-        return [self.sample_once() for i in range(0, n_samples)]
+    @timed("sample")
+    def sample(
+        self,
+        n_samples: int,
+        rng: np.random.Generator | None = None,
+        points: UnitPoints | None = None,
+    ) -> np.ndarray:
+        if len(self.leaves) == 0:
+            raise ValueError("Cannot sample a tree without leaves.")
+        if points is None:
+            points = IidPoints(1 + self.leaves.n_axes, rng or np.random.default_rng())
+
+        # The first coordinate picks a leaf, the others a cell along each side.
+        draws = points.next(n_samples)
+        leaf = np.searchsorted(self._cumulative_weights, draws[:, 0], side="right")
+        side_bit_depths = self.leaves.side_bit_depths[leaf]
+        offsets = np.floor(draws[:, 1:] * np.exp2(side_bit_depths)).astype(INT_DTYPE)
+        return self.leaves.endpoints[leaf] + offsets
+
+    def iter_samples(
+        self,
+        n_samples: int,
+        chunk_size: int = SAMPLES_CHUNK_SIZE,
+        rng: np.random.Generator | None = None,
+        points: UnitPoints | None = None,
+    ) -> Iterator[np.ndarray]:
+        if points is None:
+            points = IidPoints(1 + self.leaves.n_axes, rng or np.random.default_rng())
+        for start in range(0, n_samples, chunk_size):
+            yield self.sample(min(chunk_size, n_samples - start), points=points)
@@ -0,0 +1,175 @@
+from itertools import product
+
+import numpy as np
+
+from gfs import metrics
+from gfs.sample.algebra import (
+    BRUTE_FORCE_MAX_PAIRS,
+    _all_pairs,
+    _intersect_leaves,
+    _intersect_pairs,
+    _overlapping_pairs,
+    multiply,
+    multiply_powers,
+)
+from gfs.sample.functions import constant, linear
+from gfs.sample.leaf import Leaf, LeafList, Side, coarsen, combine_on_multiplicity
+from gfs.sample.prune import FixedRange, LeafCap
+
+
+def _cell_weights(leaves: LeafList, bit_depth: int) -> list[int]:
+    weights = [0] * (1 << bit_depth)
+    for leaf in leaves:
+        side = leaf.sides[0]
+        for cell in range(side.endpoint, side.endpoint + (1 << side.bit_depth)):
+            weights[cell] += 1 << leaf.multiplicity
+    return weights
+
+
+def _as_set(leaves: list[Leaf]) -> list[tuple]:
+    return sorted((leaf.multiplicity, tuple(leaf.sides)) for leaf in leaves)
+
+
+def test_leaf_list_round_trips_leaves():
+    leaves = [
+        Leaf(multiplicity=2, sides=[Side(0, 3), Side(4, 2)]),
+        Leaf(multiplicity=0, sides=[Side(8, 3), Side(0, 0)]),
+    ]
+    leaf_list = LeafList(leaves)
+    assert len(leaf_list) == 2
+    assert list(leaf_list) == leaves
+    assert leaf_list[1] == leaves[1]
+    assert leaf_list.bit_depth.tolist() == [7, 3]
+
+
+def test_multiply_matches_pairwise_intersection():
+    left = LeafList(
+        [
+            Leaf(multiplicity=1, sides=[Side(1, 2), Side(0, 3)]),
+            Leaf(multiplicity=0, sides=[Side(0, 1), Side(3, 2)]),
+        ]
+    )
+    right = LeafList(
+        [
+            Leaf(multiplicity=0, sides=[Side(2, 2), Side(2, 1)]),
+            Leaf(multiplicity=2, sides=[Side(0, 3), Side(5, 0)]),
+        ]
+    )
+    expected: list[Leaf] = list()
+    for l1, l2 in product(left, right):
+        expected.extend(_intersect_leaves(l1, l2))
+    expected_leaves = combine_on_multiplicity(LeafList(expected))
+    min_multiplicity = expected_leaves.multiplicity.min()
+
+    result = multiply(left, right, FixedRange(100))
+
+    assert _as_set(result) == _as_set(
+        Leaf(leaf.multiplicity - min_multiplicity, leaf.sides)
+        for leaf in expected_leaves
+    )
+
+
+def test_overlapping_pairs_match_all_pairs_above_brute_force_limit():
+    rng = np.random.default_rng(0)
+
+    def random_leaves(n_leaves: int) -> LeafList:
+        side_bit_depths = rng.integers(0, 6, size=(n_leaves, 2))
+        endpoints = rng.integers(0, 1 << (6 - side_bit_depths)) << side_bit_depths
+        multiplicity = rng.integers(0, 4, size=n_leaves)
+        return LeafList.from_arrays(multiplicity, endpoints, side_bit_depths)
+
+    left = random_leaves(200)
+    right = random_leaves(100)
+    assert len(left) * len(right) > BRUTE_FORCE_MAX_PAIRS
+
+    for first, second in [(left, right), (right, left)]:
+        indexed = _intersect_pairs(first, second, *_overlapping_pairs(first, second))
+        expected = _intersect_pairs(first, second, *_all_pairs(first, second))
+        assert len(expected) > 0
+        assert _as_set(indexed) == _as_set(expected)
+
+
+def test_multiply_by_constant_is_identity():
+    leaves = linear(domain_bit_depth=4)
+    result = multiply(constant(domain_bit_depths=[4]), leaves, FixedRange(100))
+    assert _as_set(result) == _as_set(leaves)
+
+
+def test_combine_on_multiplicity_carries_duplicates():
+    sides = [Side(4, 2)]
+    leaves = LeafList(
+        [
+            Leaf(0, sides),
+            Leaf(0, sides),
+            Leaf(1, sides),
+            Leaf(0, sides),
+            Leaf(0, [Side(0, 2)]),
+        ]
+    )
+    combined = combine_on_multiplicity(leaves)
+    assert _as_set(combined) == _as_set(
+        [Leaf(0, sides), Leaf(2, sides), Leaf(0, [Side(0, 2)])]
+    )
+    assert combined.n_blocks == leaves.n_blocks
+
+
+def test_coarsen_merges_siblings_with_equal_multiplicity():
+    leaves = LeafList(
+        [
+            *[Leaf(1, [Side(cell, 0)]) for cell in range(0, 4)],
+            Leaf(0, [Side(4, 0)]),
+            Leaf(1, [Side(5, 0)]),
+            Leaf(0, [Side(6, 0)]),
+            Leaf(0, [Side(7, 0)]),
+        ]
+    )
+    coarsened = coarsen(leaves)
+    assert _as_set(coarsened) == _as_set(
+        [
+            Leaf(1, [Side(0, 2)]),
+            Leaf(0, [Side(4, 0)]),
+            Leaf(1, [Side(5, 0)]),
+            Leaf(0, [Side(6, 1)]),
+        ]
+    )
+    assert _cell_weights(coarsened, 3) == _cell_weights(leaves, 3)
+    assert coarsened.n_blocks == leaves.n_blocks
+
+
+def test_coarsen_merges_across_axes():
+    leaves = LeafList(
+        [Leaf(0, [Side(x, 0), Side(y, 0)]) for x, y in product(range(0, 2), repeat=2)]
+    )
+    assert _as_set(coarsen(leaves)) == _as_set([Leaf(0, [Side(0, 1), Side(0, 1)])])
+
+
+def test_multiply_powers_matches_repeated_multiply():
+    heads = linear(domain_bit_depth=3)
+    tails = linear(domain_bit_depth=3, reverse=True)
+    expected = constant(domain_bit_depths=[3])
+    for leaves in [heads] * 5 + [tails] * 3:
+        expected = multiply(leaves, expected, FixedRange(1000))
+
+    result = multiply_powers([(heads, 5), (tails, 3)], FixedRange(1000))
+
+    expected_weights = _cell_weights(expected, 3)
+    result_weights = _cell_weights(result, 3)
+    ratio = max(result_weights) // max(expected_weights)
+    assert result_weights == [ratio * weight for weight in expected_weights]
+
+
+def test_multiply_powers_caps_every_product_against_the_reference():
+    heads = linear(domain_bit_depth=8)
+    tails = linear(domain_bit_depth=8, reverse=True)
+    pruning = LeafCap(max_leaves=5)
+
+    run_metrics = metrics.enable("test", "project")
+    try:
+        multiply_powers([(heads, 40), (tails, 40)], pruning, reference=constant([8]))
+    finally:
+        metrics.disable()
+
+    summary = run_metrics.to_dict()
+    assert max(entry["n_leaves"] for entry in summary["leaves"]) <= 5
+    assert summary["pruning"]["count"] == pruning.n_steps > 0
+    assert pruning.dropped_leaves > 0 and pruning.dropped_mass > 0
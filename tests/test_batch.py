@@ -0,0 +1,63 @@
+import os
+
+from gfs.app.batch import BatchTask, run_batch
+
+# Configs are named "<key>:<output>:<input>", and running one writes its output
+# file after checking that its input file exists.
+
+
+def _describe(config: str, command: str) -> BatchTask:
+    _, output, input = config.split(":")
+    inputs = (input,) if input != "" else ()
+    return BatchTask(config, command, inputs, output)
+
+
+def _key(task: BatchTask) -> str | None:
+    return task.config.split(":")[0] or None
+
+
+def _run(config: str, command: str) -> None:
+    _, output, input = config.split(":")
+    if input != "" and not os.path.exists(input):
+        raise FileNotFoundError(input)
+    if "fail" in output:
+        raise RuntimeError("task failed")
+    with open(output, "a") as f:
+        f.write(command + "\n")
+
+
+def _statuses(results) -> dict[tuple[str, str], str]:
+    return {(result.config, result.command): result.status for result in results}
+
+
+def test_run_batch_shares_work_and_orders_dependencies(tmp_path):
+    first = f"k:{tmp_path / 'a'}:"
+    duplicate = f"k:{tmp_path / 'b'}:"
+    dependent = f":{tmp_path / 'c'}:{tmp_path / 'a'}"
+    results = run_batch(
+        [dependent, first, duplicate], ["update"], 2, _describe, _key, _run
+    )
+
+    assert _statuses(results) == {
+        (first, "update"): "ok",
+        (duplicate, "update"): "shared",
+        (dependent, "update"): "ok",
+    }
+    shared = [result for result in results if result.status == "shared"]
+    assert shared[0].shared_with == first
+    assert (tmp_path / "c").exists()
+
+
+def test_run_batch_skips_later_stages_after_a_failure(tmp_path):
+    failing = f"k:{tmp_path / 'fail'}:"
+    follower = f"k:{tmp_path / 'b'}:"
+    results = run_batch(
+        [failing, follower], ["update", "sample"], 1, _describe, _key, _run
+    )
+
+    assert _statuses(results) == {
+        (failing, "update"): "failed",
+        (follower, "update"): "skipped",
+        (failing, "sample"): "skipped",
+        (follower, "sample"): "skipped",
+    }
@@ -0,0 +1,170 @@
+import numpy as np
+import pytest
+
+from gfs import metrics
+from gfs.app.bayes import (
+    Model,
+    Posterior,
+    Prior,
+    predict,
+    predict_batch,
+    predict_exact,
+    sample,
+    sample_weighted,
+    update_prior,
+)
+from gfs.app.elements import DataPoint, ParameterSamples, XDataPoint, YDataPoint
+from gfs.models.binomial import BinomialModel
+from gfs.sample.algebra import multiply
+from gfs.sample.functions import linear
+from gfs.sample.leaf import LeafList
+from gfs.sample.marginals import leaf_probabilities, moments
+from gfs.sample.prune import FixedRange, LeafCap, MassBudget
+
+
+def _coin_flips(n_heads: int, n_tails: int) -> list[DataPoint]:
+    return [
+        DataPoint(id=i, y=YDataPoint([int(i < n_heads)]))
+        for i in range(0, n_heads + n_tails)
+    ]
+
+
+def test_update_prior_with_data_against_the_prior_matches_sequential_updates():
+    model = BinomialModel(bit_depth=8)
+    prior = Prior(
+        update_prior(model.prior, model.likelihood, _coin_flips(150, 2), FixedRange(10))
+    )
+    tails = _coin_flips(0, 36)
+
+    posterior = update_prior(prior, model.likelihood, tails, FixedRange(10))
+
+    expected = LeafList(prior)
+    for datum in tails:
+        expected = multiply(expected, model.likelihood.leaves(datum), FixedRange(10))
+    mean, variance = moments(posterior)
+    expected_mean, expected_variance = moments(expected)
+    assert mean == pytest.approx(expected_mean, rel=1e-3)
+    assert variance == pytest.approx(expected_variance, rel=0.2)
+
+
+def _cell_probabilities(leaves: LeafList, bit_depth: int) -> np.ndarray:
+    probabilities = np.zeros(1 << bit_depth)
+    for leaf, probability in zip(leaves, leaf_probabilities(leaves)):
+        side = leaf.sides[0]
+        n_cells = 1 << side.bit_depth
+        probabilities[side.endpoint : side.endpoint + n_cells] += probability / n_cells
+    return probabilities
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_update_prior_matches_the_beta_posterior(workers):
+    model = BinomialModel(bit_depth=6)
+    data = [DataPoint(id=i, y=YDataPoint([int(i % 4 != 0)])) for i in range(0, 40)]
+    # Cell c of the linear likelihood has weight c, so the posterior of 30 heads
+    # and 10 tails under a flat prior is proportional to c^30 (63 - c)^10.
+    cells = np.arange(0, 64)
+    with np.errstate(divide="ignore"):
+        log_weights = 30 * np.log(cells) + 10 * np.log(63 - cells)
+    beta = np.exp(log_weights - log_weights.max())
+    beta /= beta.sum()
+
+    for epsilon in [0.0, 1e-3]:
+        pruning = MassBudget(epsilon)
+        posterior = update_prior(
+            model.prior, model.likelihood, data, pruning, workers=workers
+        )
+        distance = np.abs(_cell_probabilities(posterior, 6) - beta).sum() / 2
+        assert distance <= max(pruning.dropped_mass, 1e-6)
+        if epsilon == 0:
+            assert distance < 1e-6
+
+
+def test_predict_batch_matches_predict():
+    model = BinomialModel(bit_depth=3)
+    samples = ParameterSamples([(0.25,), (0.5,), (0.25,), (0.875,)])
+    xs: list[XDataPoint | None] = [None, None, None]
+
+    predictions = predict_batch(model, samples, xs)
+    fallback = Model.dist_batch(model, np.array([[0.25], [0.875]]), xs)
+
+    expected = predict(model, samples.weighted, None).mean
+    assert predictions.shape == (3, 2)
+    assert np.allclose(predictions, [expected] * 3)
+    assert np.array_equal(fallback, model.dist_batch(np.array([[0.25], [0.875]]), xs))
+
+
+def test_sample_weighted_counts_the_samples_drawn():
+    model = BinomialModel(bit_depth=4)
+    posterior = Posterior(linear(domain_bit_depth=4))
+
+    weighted = sample_weighted(posterior, model.param_domain, 1000, seed=0)
+
+    assert weighted.n_samples == 1000
+    assert weighted == sample(posterior, model.param_domain, 1000, seed=0).weighted
+    assert np.isclose(predict(model, weighted, None).mean[1], 0.6, atol=0.05)
+
+
+def test_predict_exact_matches_posterior_mean():
+    model = BinomialModel(bit_depth=4)
+    posterior = Posterior(linear(domain_bit_depth=4))
+    weights = [0] * 16
+    for leaf in posterior:
+        side = leaf.sides[0]
+        for cell in range(side.endpoint, side.endpoint + (1 << side.bit_depth)):
+            weights[cell] += 1 << leaf.multiplicity
+    mean = sum([cell / 16 * weight for cell, weight in enumerate(weights)]) / sum(
+        weights
+    )
+
+    predictions = predict_exact(model, posterior, [None, None])
+    fallback = Model.expected_dist_over_boxes(model, posterior, [None])
+
+    assert np.allclose(predictions, [[1 - mean, mean]] * 2)
+    assert np.allclose(fallback, model.expected_dist_over_boxes(posterior, [None]))
+
+
+@pytest.mark.parametrize("n_heads, n_tails", [(60, 60), (90, 30)])
+def test_parallel_update_prior_matches_serial_on_ordered_data(n_heads, n_tails):
+    model = BinomialModel(bit_depth=6)
+    data = _coin_flips(n_heads, n_tails)
+    serial = update_prior(model.prior, model.likelihood, data, FixedRange(10))
+
+    for workers in [2, 3]:
+        parallel = update_prior(
+            model.prior, model.likelihood, data, FixedRange(10), workers=workers
+        )
+        mean, variance = moments(parallel)
+        expected_mean, expected_variance = moments(serial)
+        assert mean == pytest.approx(expected_mean, rel=1e-3)
+        assert variance == pytest.approx(expected_variance, rel=0.05)
+
+
+def test_parallel_update_prior_counts_all_pruning():
+    model = BinomialModel(bit_depth=6)
+    data = [DataPoint(id=i, y=YDataPoint([i % 2])) for i in range(0, 120)]
+
+    totals = []
+    for workers in [1, 4]:
+        pruning = FixedRange(10)
+        run_metrics = metrics.enable("update_prior", "coin")
+        try:
+            update_prior(model.prior, model.likelihood, data, pruning, workers=workers)
+        finally:
+            metrics.disable()
+        summary = run_metrics.to_dict()["pruning"]
+        assert summary["count"] == pruning.n_steps
+        assert summary["dropped_mass"] == pytest.approx(pruning.dropped_mass)
+        totals.append((pruning.n_steps, pruning.dropped_mass))
+
+    (serial_steps, serial_mass), (parallel_steps, parallel_mass) = totals
+    assert serial_steps > 1 and parallel_steps > 1
+    assert serial_mass > 0
+    assert parallel_mass == pytest.approx(serial_mass, rel=0.2)
+
+
+def test_update_prior_reports_when_pruning_leaves_nothing():
+    model = BinomialModel(bit_depth=6)
+    data = [DataPoint(id=i, y=YDataPoint([i % 2])) for i in range(0, 120)]
+
+    with pytest.raises(ValueError, match="no leaves"):
+        update_prior(model.prior, model.likelihood, data, LeafCap(5), workers=4)
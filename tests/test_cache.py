@@ -0,0 +1,32 @@
+import os
+
+from gfs.app.cache import ArtifactCache, cache_key, data_slice
+
+
+def test_cache_restores_and_evicts_least_recently_used(tmp_path):
+    cache = ArtifactCache(str(tmp_path / "cache"), max_bytes=250)
+    artifact = tmp_path / "posterior.json"
+    keys = [cache_key("stage", n=n) for n in range(0, 3)]
+    for i, key in enumerate(keys[:2]):
+        artifact.write_bytes(b"x" * 100)
+        cache.store(key, str(artifact))
+        os.utime(os.path.join(cache.directory, key + ".json"), (i, i))
+
+    restored = tmp_path / "out" / "restored.json"
+    assert cache.restore(keys[0], str(restored))
+    assert restored.read_bytes() == b"x" * 100
+    cache.store(keys[2], str(artifact))
+
+    assert not cache.restore(keys[1], str(restored))
+    assert cache.restore(keys[0], str(restored))
+    assert cache.restore(keys[2], str(restored))
+
+
+def test_data_slice_depends_only_on_the_rows_used(tmp_path):
+    data_file = tmp_path / "data.csv"
+    data_file.write_text("0,1\n1,0\n")
+    first = data_slice(str(data_file), n_data_points=1)
+    data_file.write_text("0,1\n1,1\n2,0\n")
+    assert data_slice(str(data_file), n_data_points=1) == first
+    assert first.offset == 4
+    assert data_slice(str(data_file), n_data_points=5).n_data_points == 3
@@ -0,0 +1,236 @@
+import os
+from dataclasses import replace
+
+import pytest
+
+from gfs.app import client, io
+from gfs.app.cache import data_slice
+from gfs.app.client import _run_batch_task, _scale_models, cli_update_prior
+from gfs.app.elements import DataPoint, YDataPoint
+from gfs.app.io import load_leaves, load_progress, load_project, progress_filepath
+from gfs.app.project import Project
+from gfs.models.binomial import BinomialModel, BinomialPreprocessor
+
+CONFIG = """
+name = "coin"
+tags = []
+
+[model]
+name = "binomial"
+kwargs = {{ bit_depth = 6 }}
+
+[params]
+n_data_points = 150
+n_posterior_samples = 100
+batch_size = 20
+
+[io]
+training_data_file = "{directory}/data.csv"
+input_data_file = "{directory}/data.csv"
+posterior_file = "{directory}/posterior.json"
+posterior_samples_file = "{directory}/samples.samples"
+prediction_file = "{directory}/predictions.csv"
+
+[io.preprocessor]
+name = "binomial"
+kwargs = {{}}
+"""
+
+
+@pytest.fixture
+def config(tmp_path) -> str:
+    # Ordered data: every batch disagrees with the posterior of the ones before.
+    rows = [f"{i},{int(i < 75)}\n" for i in range(0, 150)]
+    (tmp_path / "data.csv").write_text("".join(rows))
+    config_file = tmp_path / "coin.toml"
+    config_file.write_text(CONFIG.format(directory=tmp_path))
+    return str(config_file)
+
+
+class FlippingPreprocessor(BinomialPreprocessor):
+    def __init__(self, flip: bool) -> None:
+        self.flip = flip
+
+    def process_row(self, row: list[str]) -> DataPoint:
+        datum = super().process_row(row)
+        if not self.flip:
+            return datum
+        return DataPoint(id=datum.id, y=YDataPoint([1 - datum.y[0]]))
+
+
+class LabelledModel(BinomialModel):
+    def __init__(self, bit_depth: int, label: str) -> None:
+        super().__init__(bit_depth=bit_depth)
+        self.label = label
+
+
+class FixedModel(BinomialModel):
+    def __init__(self) -> None:
+        super().__init__(bit_depth=4)
+
+
+def _update(config: str, **kwargs) -> Project:
+    project = load_project(config=config, **kwargs)
+    cli_update_prior(project)
+    return project
+
+
+def _posterior(project: Project) -> list[tuple]:
+    leaves = load_leaves(project.posterior_file, project.model.param_domain)
+    return sorted((leaf.multiplicity, tuple(leaf.sides)) for leaf in leaves)
+
+
+def _interrupt_after(monkeypatch, n_batches: int) -> None:
+    update_prior = client.update_prior
+    calls = []
+
+    def interrupted(**kwargs):
+        calls.append(None)
+        if len(calls) > n_batches:
+            raise KeyboardInterrupt
+        return update_prior(**kwargs)
+
+    monkeypatch.setattr(client, "update_prior", interrupted)
+
+
+def test_checkpoint_cadence_does_not_change_the_posterior(config, tmp_path):
+    expected = _posterior(_update(config))
+    for checkpoint_every in [7, 40]:
+        project = _update(
+            config,
+            posterior_file=str(tmp_path / f"every-{checkpoint_every}.json"),
+            checkpoint_every=checkpoint_every,
+        )
+        assert _posterior(project) == expected
+
+
+def test_cached_posterior_matches_any_checkpoint_cadence(config, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    checkpointed = _update(config, checkpoint_every=7, cache_dir=cache_dir)
+    expected = _posterior(checkpointed)
+    os.remove(checkpointed.posterior_file)
+
+    project = _update(config, cache_dir=cache_dir)
+
+    assert len(os.listdir(cache_dir)) == 1
+    assert _posterior(project) == expected
+    assert _posterior(_update(config, posterior_file=str(tmp_path / "new.json"))) == (
+        expected
+    )
+
+
+def test_resume_after_interruption_matches_uninterrupted_update(
+    config, tmp_path, monkeypatch
+):
+    expected = _posterior(_update(config))
+    posterior_file = str(tmp_path / "interrupted.json")
+
+    _interrupt_after(monkeypatch, n_batches=5)
+    with pytest.raises(KeyboardInterrupt):
+        _update(config, posterior_file=posterior_file, checkpoint_every=40)
+    progress = load_progress(progress_filepath(posterior_file))
+    assert progress.n_data_points == 80
+    assert os.path.exists(progress.leaves_file)
+
+    monkeypatch.undo()
+    project = _update(
+        config, posterior_file=posterior_file, checkpoint_every=40, resume=True
+    )
+
+    assert _posterior(project) == expected
+    assert load_progress(progress_filepath(posterior_file)).n_data_points == 150
+    assert not os.path.exists(progress.leaves_file)
+    assert not any("__checkpoint-" in name for name in os.listdir(tmp_path))
+
+
+def test_resume_keeps_the_recorded_batch_size(config, tmp_path, monkeypatch, caplog):
+    expected = _posterior(_update(config))
+    posterior_file = str(tmp_path / "interrupted.json")
+    _interrupt_after(monkeypatch, n_batches=2)
+    with pytest.raises(KeyboardInterrupt):
+        _update(config, posterior_file=posterior_file, checkpoint_every=7)
+    assert "not a multiple of batch_size=20" in caplog.text
+    assert load_progress(progress_filepath(posterior_file)).batch_size == 20
+
+    monkeypatch.undo()
+    project = _update(config, posterior_file=posterior_file, batch_size=30, resume=True)
+
+    assert "Resuming with batch_size=20" in caplog.text
+    assert _posterior(project) == expected
+    assert load_progress(progress_filepath(posterior_file)).batch_size == 20
+
+
+def test_resume_from_prior_reads_only_new_rows(config, tmp_path):
+    expected = _posterior(_update(config))
+    prior_file = str(tmp_path / "first-100.json")
+    _update(config, posterior_file=prior_file, n_data_points=100)
+
+    project = _update(
+        config,
+        prior_file=prior_file,
+        posterior_file=str(tmp_path / "appended.json"),
+        resume=True,
+    )
+
+    assert _posterior(project) == expected
+    progress = load_progress(progress_filepath(project.posterior_file))
+    assert progress.n_data_points == 150
+
+
+def test_batch_task_reuses_the_data_slice_it_is_given(config, tmp_path, monkeypatch):
+    project = load_project(config=config)
+    data_slices = {
+        config: data_slice(project.training_data_file, project.params.n_data_points)
+    }
+    cache_dir = str(tmp_path / "cache")
+
+    def hash_again(*args):
+        raise AssertionError("Training data hashed again")
+
+    monkeypatch.setattr(client, "data_slice", hash_again)
+    _run_batch_task(config, "update_prior", cache_dir, data_slices)
+
+    assert os.path.exists(project.posterior_file)
+    assert len(os.listdir(cache_dir)) == 1
+
+
+def test_preprocessor_kwargs_are_part_of_the_cache_key(config, tmp_path, monkeypatch):
+    monkeypatch.setitem(io.PREPROCESSORS, "flipping", FlippingPreprocessor)
+    cache_dir = str(tmp_path / "cache")
+    posteriors = []
+    for flip in ["false", "true"]:
+        flipping_config = tmp_path / f"flip-{flip}.toml"
+        flipping_config.write_text(
+            CONFIG.format(directory=tmp_path).replace(
+                'name = "binomial"\nkwargs = {}',
+                f'name = "flipping"\nkwargs = {{ flip = {flip} }}',
+            )
+        )
+        project = _update(
+            str(flipping_config),
+            posterior_file=str(tmp_path / f"flip-{flip}.json"),
+            cache_dir=cache_dir,
+        )
+        posteriors.append(_posterior(project))
+
+    assert len(os.listdir(cache_dir)) == 2
+    assert posteriors[0] != posteriors[1]
+
+
+def test_scale_models_keep_the_other_model_kwargs(config, tmp_path, monkeypatch):
+    monkeypatch.setitem(io.MODELS, "labelled", LabelledModel)
+    labelled_config = tmp_path / "labelled.toml"
+    labelled_config.write_text(
+        CONFIG.format(directory=tmp_path).replace(
+            'name = "binomial"\nkwargs = { bit_depth = 6 }',
+            'name = "labelled"\nkwargs = { bit_depth = 6, label = "coin" }',
+        )
+    )
+    project = load_project(config=str(labelled_config))
+
+    models = _scale_models(project, [3, 5])
+
+    assert [model.param_domain.bit_depth for model in models] == [3, 5]
+    assert [model.label for model in models] == ["coin", "coin"]
+    with pytest.raises(ValueError, match="bit_depth"):
+        _scale_models(replace(project, model=FixedModel()), [3])
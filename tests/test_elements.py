@@ -0,0 +1,36 @@
+import numpy as np
+
+from gfs.app.domain import Axis, Domain
+from gfs.app.elements import (
+    Distribution,
+    ParameterSamples,
+    PredictiveDists,
+    WeightedParameterSamples,
+)
+
+DOMAIN = Domain([Axis("a", 0.0, 1.0, 2), Axis("b", 0.0, 2.0, 1)])
+
+
+def test_weighted_samples_merge_chunks():
+    chunks = [np.array([[0, 1], [3, 0], [0, 1]]), np.array([[3, 0], [0, 1]])]
+    samples = WeightedParameterSamples.from_coordinates(chunks, DOMAIN)
+    assert samples == {(0.0, 1.0): 3, (0.75, 0.0): 2}
+    assert samples.n_samples == 5
+
+
+def test_weighted_mean_matches_unweighted_mean():
+    samples = ParameterSamples([(0.25,), (0.5,), (0.25,), (0.25,)])
+    unweighted = PredictiveDists(
+        [Distribution([1 - p[0], p[0]]) for p in samples],
+    )
+    weighted = PredictiveDists()
+    for parameter, count in samples.weighted.items():
+        weighted.append_weighted(Distribution([1 - parameter[0], parameter[0]]), count)
+    assert weighted.mean == unweighted.mean == (0.6875, 0.3125)
+
+
+def test_weighted_samples_to_arrays():
+    samples = WeightedParameterSamples({(0.0, 1.0): 3, (0.75, 0.0): 2})
+    parameters, counts = samples.to_arrays()
+    assert parameters.tolist() == [[0.0, 1.0], [0.75, 0.0]]
+    assert counts.tolist() == [3, 2]
@@ -0,0 +1,113 @@
+import numpy as np
+import pytest
+
+from gfs.app.domain import Axis, Domain
+from gfs.app.io import (
+    export_leaves,
+    export_sample_chunks,
+    export_tree,
+    iter_data,
+    load_leaves,
+    load_samples,
+    load_tree,
+    tree_filepath,
+)
+from gfs.models.binomial import BinomialPreprocessor
+from gfs.sample.leaf import Leaf, LeafList, Side
+from gfs.sample.tree import Tree
+
+DOMAIN = Domain([Axis("a", 0.0, 1.0, 4), Axis("b", -1.0, 1.0, 3)])
+LEAVES = LeafList(
+    [
+        Leaf(multiplicity=3, sides=[Side(0, 2), Side(4, 2)]),
+        Leaf(multiplicity=0, sides=[Side(8, 3), Side(1, 0)]),
+    ]
+)
+
+
+@pytest.mark.parametrize("extension", [".json", ".leaves"])
+def test_leaves_round_trip(tmp_path, extension):
+    filepath = str(tmp_path / f"posterior{extension}")
+    export_leaves(LEAVES, filepath, domain=DOMAIN)
+    assert load_leaves(filepath, domain=DOMAIN) == LEAVES
+
+
+def test_binary_leaves_check_domain(tmp_path):
+    filepath = str(tmp_path / "posterior.leaves")
+    export_leaves(LEAVES, filepath, domain=DOMAIN)
+    with pytest.raises(ValueError):
+        load_leaves(filepath, domain=Domain([Axis("a", 0.0, 1.0, 4)]))
+
+
+def test_binary_leaves_empty(tmp_path):
+    filepath = str(tmp_path / "posterior.leaves")
+    export_leaves(LeafList(), filepath)
+    assert len(load_leaves(filepath)) == 0
+
+
+def test_binary_samples_round_trip(tmp_path):
+    filepath = str(tmp_path / "samples.samples")
+    chunks = [
+        np.array([[0, 1], [15, 7]]),
+        np.array([[15, 7]]),
+    ]
+    export_sample_chunks(chunks, filepath, domain=DOMAIN)
+
+    samples = load_samples(filepath)
+    assert np.array_equal(samples.coordinates, np.concatenate(chunks))
+    assert list(samples) == [(0.0, -0.75), (0.9375, 0.75), (0.9375, 0.75)]
+    assert samples.histogram == {(0.0, -0.75): 1, (0.9375, 0.75): 2}
+
+
+@pytest.mark.parametrize("extension", [".samples", ".csv"])
+def test_sample_chunks_stream_through_a_bounded_queue(tmp_path, extension):
+    filepath = str(tmp_path / f"samples{extension}")
+    chunks = (np.array([[i, i % 8]]) for i in range(0, 10))
+    export_sample_chunks(chunks, filepath, domain=DOMAIN, queue_size=1)
+    samples = load_samples(filepath, domain=DOMAIN)
+    assert list(samples) == [DOMAIN.scale((i, i % 8)) for i in range(0, 10)]
+
+
+def test_sample_chunk_errors_reach_the_caller(tmp_path):
+    def chunks():
+        yield np.array([[0, 1]])
+        raise RuntimeError("sampling failed")
+
+    with pytest.raises(RuntimeError):
+        export_sample_chunks(chunks(), str(tmp_path / "samples.samples"), DOMAIN)
+    with pytest.raises(OSError):
+        export_sample_chunks(
+            (np.array([[0, 1]]) for _ in range(0, 100)),
+            str(tmp_path),
+            DOMAIN,
+            queue_size=1,
+        )
+
+
+def test_iter_data_resumes_from_offset(tmp_path):
+    filepath = tmp_path / "data.csv"
+    filepath.write_text("0,1\n1,0\n2,1\n")
+    preprocessor = BinomialPreprocessor()
+    data = list(iter_data(str(filepath), preprocessor))
+    assert [datum.id for datum, _ in data] == [0, 1, 2]
+    assert data[-1][1] == filepath.stat().st_size
+
+    resumed = list(iter_data(str(filepath), preprocessor, offset=data[0][1]))
+    assert resumed == data[1:]
+
+
+def test_tree_index_round_trip(tmp_path):
+    source = str(tmp_path / "posterior.leaves")
+    export_leaves(LEAVES, source, domain=DOMAIN)
+    filepath = tree_filepath(source)
+    tree = Tree(LEAVES)
+    export_tree(tree, filepath, domain=DOMAIN, source=source)
+
+    loaded = load_tree(filepath, domain=DOMAIN, source=source)
+    assert loaded.leaves == tree.leaves
+    assert np.array_equal(loaded.cumulative_weights, tree.cumulative_weights)
+    samples = loaded.sample(100, rng=np.random.default_rng(0))
+    assert np.array_equal(samples, tree.sample(100, rng=np.random.default_rng(0)))
+
+    export_leaves(LEAVES.take(np.array([0])), source, domain=DOMAIN)
+    assert load_tree(filepath, domain=DOMAIN, source=source) is None
@@ -0,0 +1,89 @@
+import tracemalloc
+
+import numpy as np
+
+from gfs.sample.functions import linear
+from gfs.sample.leaf import Leaf, LeafList, Side
+from gfs.sample.marginals import bin_edges, bin_mass, marginal_mass, moments, quantiles
+
+
+def _cell_probabilities(leaves: LeafList, bit_depths: list[int]) -> np.ndarray:
+    weights = np.zeros([1 << bit_depth for bit_depth in bit_depths])
+    for leaf in leaves:
+        cells = tuple(
+            slice(side.endpoint, side.endpoint + (1 << side.bit_depth))
+            for side in leaf.sides
+        )
+        weights[cells] += 2.0**leaf.multiplicity
+    return weights / weights.sum()
+
+
+def test_bin_mass_matches_cell_weights():
+    leaves = LeafList(
+        [
+            Leaf(multiplicity=1, sides=[Side(0, 2), Side(4, 1)]),
+            Leaf(multiplicity=0, sides=[Side(4, 2), Side(0, 3)]),
+            Leaf(multiplicity=3, sides=[Side(6, 0), Side(7, 0)]),
+        ]
+    )
+    expected = _cell_probabilities(leaves, [3, 3])
+
+    mass = bin_mass(leaves, [bin_edges(3), bin_edges(3)])
+
+    assert np.allclose(mass, expected)
+    coarse = bin_mass(leaves, [bin_edges(3, 2), bin_edges(3, 4)])
+    assert np.allclose(coarse, expected.reshape(2, 4, 4, 2).sum(axis=(1, 3)))
+
+
+def test_bin_mass_matches_cell_weights_for_overlapping_leaves():
+    rng = np.random.default_rng(0)
+    side_bit_depths = rng.integers(0, 4, size=(50, 2))
+    endpoints = rng.integers(0, 1 << (5 - side_bit_depths)) << side_bit_depths
+    leaves = LeafList.from_arrays(
+        rng.integers(0, 8, size=50), endpoints, side_bit_depths
+    )
+    expected = _cell_probabilities(leaves, [5, 5])
+
+    edges = [bin_edges(5, 3), bin_edges(5)]
+    mass = bin_mass(leaves, edges)
+
+    rows = np.add.reduceat(expected, edges[0][:-1], axis=0)
+    assert np.allclose(mass, rows)
+    assert np.allclose(marginal_mass(leaves, 1, edges[1]), expected.sum(axis=0))
+
+
+def test_bin_mass_memory_does_not_grow_with_leaf_boundaries():
+    rng = np.random.default_rng(0)
+    side_bit_depths = rng.integers(0, 4, size=(100_000, 2))
+    endpoints = rng.integers(0, 1 << (14 - side_bit_depths)) << side_bit_depths
+    leaves = LeafList.from_arrays(
+        rng.integers(0, 8, size=100_000), endpoints, side_bit_depths
+    )
+    edges = [bin_edges(14, 8), bin_edges(14, 8)]
+
+    tracemalloc.start()
+    try:
+        mass = bin_mass(leaves, edges)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    assert peak < 64 << 20
+    assert mass.shape == (8, 8)
+    assert np.isclose(mass.sum(), 1.0)
+    assert np.allclose(mass.sum(axis=0), marginal_mass(leaves, 1, edges[1]))
+
+
+def test_marginal_summaries_match_cell_weights():
+    leaves = linear(domain_bit_depth=4)
+    probabilities = _cell_probabilities(leaves, [4])
+    cells = np.arange(16)
+    mean = (probabilities * cells).sum()
+
+    assert np.allclose(marginal_mass(leaves, 0, bin_edges(4)), probabilities)
+    assert np.allclose(
+        moments(leaves), ([mean], [(probabilities * cells**2).sum() - mean**2])
+    )
+    levels = [0.1, 0.5, 0.9]
+    expected = np.searchsorted(np.cumsum(probabilities), levels)
+    assert quantiles(leaves, 0, levels, 4).tolist() == expected.tolist()
@@ -0,0 +1,30 @@
+from gfs import metrics
+from gfs.sample.algebra import multiply
+from gfs.sample.functions import constant, linear
+from gfs.sample.prune import FixedRange
+
+
+def test_metrics_record_stages_and_leaves():
+    run_metrics = metrics.enable("test", "project")
+    try:
+        leaves = multiply(constant(domain_bit_depths=[4]), linear(4), FixedRange(10))
+    finally:
+        metrics.disable()
+
+    summary = run_metrics.to_dict()
+    assert summary["stages"]["multiply"]["count"] == 1
+    assert {"intersect", "combine", "prune"} <= set(summary["stages"])
+    assert summary["leaves"] == [
+        {
+            "stage": "multiply",
+            "n_leaves": len(leaves),
+            "max_multiplicity": int(leaves.multiplicity.max()),
+            "bit_depth_histogram": {"0": 8, "2": 4, "4": 2, "6": 1},
+        }
+    ]
+
+
+def test_stage_is_a_no_op_when_disabled():
+    with metrics.stage("anything"):
+        pass
+    assert metrics._metrics is None
@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+from gfs import metrics
+from gfs.sample.leaf import Leaf, LeafList, Side
+from gfs.sample.marginals import leaf_probabilities
+from gfs.sample.prune import FixedRange, LeafCap, MassBudget, make_pruning
+
+# Leaf masses 8, 4, 2, 1 and 1, out of 16.
+LEAVES = LeafList(
+    [
+        Leaf(0, [Side(0, 3)]),
+        Leaf(0, [Side(8, 2)]),
+        Leaf(1, [Side(12, 0)]),
+        Leaf(0, [Side(13, 0)]),
+        Leaf(0, [Side(14, 0)]),
+    ]
+)
+
+
+def _masses(leaves: LeafList) -> list[int]:
+    return sorted((1 << leaves.bit_depth).tolist())
+
+
+def test_fixed_range_drops_leaves_below_the_range():
+    assert _masses(FixedRange(2).prune(LEAVES)) == [4, 8]
+
+
+def test_mass_budget_drops_smallest_leaves_within_epsilon():
+    pruning = MassBudget(epsilon=3 / 16)
+    assert _masses(pruning.prune(LEAVES)) == [2, 4, 8]
+    assert pruning.dropped_mass == pytest.approx(2 / 16)
+    assert pruning.dropped_leaves == 2
+
+    pruning.prune(LEAVES)
+    assert pruning.n_steps == 2
+    assert pruning.dropped_mass == pytest.approx(4 / 16)
+
+
+def test_mass_budget_keeps_at_least_one_leaf():
+    leaves = LeafList([Leaf(0, [Side(0, 0)])])
+    assert len(MassBudget(epsilon=0.99).prune(leaves)) == 1
+    with pytest.raises(ValueError):
+        MassBudget(epsilon=1.0)
+
+
+def test_leaf_cap_keeps_the_largest_leaves():
+    pruning = LeafCap(max_leaves=2)
+    pruned = pruning.prune(LEAVES)
+    assert _masses(pruned) == [4, 8]
+    assert pruning.dropped_mass == pytest.approx(4 / 16)
+    assert np.isclose(leaf_probabilities(pruned).sum(), 1.0)
+
+
+def test_prune_factor_weighs_leaves_by_their_product_bit_depth():
+    pruning = MassBudget(epsilon=0.3)
+    product_bit_depth = np.array([0.0, 0.0, -1.0, -np.inf, -np.inf])
+
+    pruned = pruning.prune_factor(LEAVES, product_bit_depth)
+
+    assert _masses(pruned) == [4, 8]
+    assert pruning.dropped_leaves == 3
+    assert pruning.dropped_mass == pytest.approx(0.2)
+
+
+def test_fixed_range_prunes_factors_to_the_likelihood_range():
+    pruning = FixedRange(leaf_bit_depth_range=1, likelihood_bit_depth_range=3)
+    product_bit_depth = np.array([0.0, -1.0, -2.0, -3.0, -np.inf])
+
+    assert _masses(pruning.prune_factor(LEAVES, product_bit_depth)) == [2, 4, 8]
+
+
+def test_pruning_is_recorded_in_metrics():
+    run_metrics = metrics.enable("test", "project")
+    try:
+        MassBudget(epsilon=3 / 16).prune(LEAVES)
+    finally:
+        metrics.disable()
+    summary = run_metrics.to_dict()["pruning"]
+    assert summary["count"] == 1
+    assert (summary["leaves_before"], summary["leaves_after"]) == (5, 3)
+    assert summary["dropped_mass"] == pytest.approx(2 / 16)
+
+
+def test_make_pruning_needs_policy_parameters():
+    assert repr(make_pruning("range", leaf_bit_depth_range=4)) == (
+        "FixedRange(leaf_bit_depth_range=4, likelihood_bit_depth_range=20)"
+    )
+    assert isinstance(make_pruning("max_leaves", max_leaves=10), LeafCap)
+    with pytest.raises(ValueError):
+        make_pruning("epsilon")
+    with pytest.raises(ValueError):
+        make_pruning("unknown")
+
+
+def test_pruning_drops_leaves_below_float_resolution():
+    leaves = LeafList([Leaf(2000, [Side(0, 0)]), Leaf(0, [Side(1, 0)])])
+    assert len(LeafCap(max_leaves=10).prune(leaves)) == 1
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from gfs.sample.qmc import SobolPoints, StratifiedPoints, make_points
+
+
+def test_sobol_points_start_with_the_reference_sequence():
+    points = SobolPoints(3, np.random.default_rng(0))
+    points.shift[:] = 0
+    assert points.next(4).tolist() == [
+        [0.0, 0.0, 0.0],
+        [0.5, 0.5, 0.5],
+        [0.75, 0.25, 0.25],
+        [0.25, 0.75, 0.75],
+    ]
+
+
+def test_sobol_points_stay_stratified_across_calls():
+    points = SobolPoints(4, np.random.default_rng(0))
+    draws = np.vstack([points.next(10), points.next(54)])
+    for column in draws.T:
+        assert sorted((column * 64).astype(int).tolist()) == list(range(0, 64))
+
+
+def test_stratified_points_cover_each_stratum():
+    draws = StratifiedPoints(2, np.random.default_rng(0)).next(100)
+    for column in draws.T:
+        assert sorted((column * 100).astype(int).tolist()) == list(range(0, 100))
+
+
+def test_points_are_reproducible_from_a_seed():
+    for strategy in ["iid", "stratified", "sobol"]:
+        first = make_points(strategy, 2, np.random.default_rng(7)).next(16)
+        second = make_points(strategy, 2, np.random.default_rng(7)).next(16)
+        assert np.array_equal(first, second)
+    with pytest.raises(ValueError):
+        make_points("halton", 2, np.random.default_rng(0))
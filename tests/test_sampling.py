@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from gfs.app import sampling
+from gfs.app.io import export_tree
+from gfs.app.sampling import _worker_n_samples, sample_coordinates_parallel
+from gfs.sample.leaf import Leaf, LeafList, Side
+from gfs.sample.tree import Tree
+
+LEAVES = LeafList(
+    [
+        Leaf(multiplicity=2, sides=[Side(0, 1), Side(4, 2)]),
+        Leaf(multiplicity=0, sides=[Side(2, 2), Side(0, 3)]),
+    ]
+)
+
+
+@pytest.fixture
+def index_file(tmp_path):
+    filepath = str(tmp_path / "posterior.tree")
+    export_tree(Tree(LEAVES), filepath)
+    return filepath
+
+
+def _crash_in_worker(*args) -> None:
+    raise MemoryError
+
+
+def _sample(index_file: str, workers: int, seed: int) -> np.ndarray:
+    chunks = sample_coordinates_parallel(
+        index_file, 1000, workers=workers, chunk_size=128, seed=seed
+    )
+    return np.concatenate(list(chunks))
+
+
+def test_worker_n_samples_cover_all_chunks():
+    for workers in [1, 2, 3, 5, 9]:
+        counts = [_worker_n_samples(1000, 128, workers, w) for w in range(workers)]
+        assert sum(counts) == 1000
+
+
+def test_parallel_samples_are_reproducible(index_file):
+    samples = _sample(index_file, workers=3, seed=0)
+    assert samples.shape == (1000, 2)
+    assert np.array_equal(samples, _sample(index_file, workers=3, seed=0))
+    assert not np.array_equal(samples, _sample(index_file, workers=3, seed=1))
+    assert not np.array_equal(samples, _sample(index_file, workers=2, seed=0))
+
+
+def test_parallel_sampling_reports_worker_errors(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        _sample(str(tmp_path / "missing.tree"), workers=2, seed=0)
+
+
+def test_parallel_sampling_reports_workers_that_die(index_file, monkeypatch):
+    monkeypatch.setattr(sampling, "_sample_in_worker", _crash_in_worker)
+    monkeypatch.setattr(sampling, "WORKER_POLL_SECONDS", 0.1)
+    with pytest.raises(RuntimeError, match="worker 0 exited with code 1"):
+        _sample(index_file, workers=2, seed=0)
@@ -0,0 +1,28 @@
+from itertools import product
+
+import pytest
+
+from gfs.app.scale import ScaleStep, growth_exponents
+
+
+def test_growth_exponents_recover_power_laws():
+    steps = [
+        ScaleStep(
+            bit_depth=bit_depth,
+            leaf_bit_depth_range=10,
+            n_data_points=n_data_points,
+            n_leaves=3 * bit_depth**2 * n_data_points,
+            max_multiplicity_bits=4,
+            peak_rss_bytes=1 << 20,
+            update_seconds=1.0,
+            multiply_seconds=0.5 * n_data_points**0.5,
+            samples_per_second=1e6 / bit_depth,
+        )
+        for bit_depth, n_data_points in product([4, 8, 16], [10, 100, 1000])
+    ]
+    exponents = {(e.metric, e.parameter): e.exponent for e in growth_exponents(steps)}
+    assert exponents[("n_leaves", "bit_depth")] == pytest.approx(2)
+    assert exponents[("n_leaves", "n_data_points")] == pytest.approx(1)
+    assert exponents[("multiply_seconds", "n_data_points")] == pytest.approx(0.5)
+    assert exponents[("samples_per_second", "bit_depth")] == pytest.approx(-1)
+    assert ("n_leaves", "leaf_bit_depth_range") not in exponents
@@ -0,0 +1,82 @@
+from collections import Counter
+from itertools import product
+
+import numpy as np
+
+from gfs.sample.leaf import Leaf, LeafList, Side
+from gfs.sample.qmc import make_points
+from gfs.sample.tree import Tree
+
+LEAVES = LeafList(
+    [
+        Leaf(multiplicity=2, sides=[Side(0, 1), Side(4, 2)]),
+        Leaf(multiplicity=0, sides=[Side(2, 2), Side(0, 3)]),
+        Leaf(multiplicity=3, sides=[Side(7, 0), Side(1, 0)]),
+    ]
+)
+
+
+def _exact_probabilities(leaves: LeafList) -> dict[tuple[int, ...], float]:
+    weights: Counter[tuple[int, ...]] = Counter()
+    for leaf in leaves:
+        ranges = [
+            range(side.endpoint, side.endpoint + (1 << side.bit_depth))
+            for side in leaf.sides
+        ]
+        for coordinates in product(*ranges):
+            weights[coordinates] += 1 << leaf.multiplicity
+    total = sum(weights.values())
+    return {coordinates: weight / total for coordinates, weight in weights.items()}
+
+
+def test_sample_matches_leaf_weights():
+    n_samples = 200000
+    samples = Tree(LEAVES).sample(n_samples, rng=np.random.default_rng(0))
+
+    assert samples.shape == (n_samples, 2)
+    counts = Counter(map(tuple, samples.tolist()))
+    expected = _exact_probabilities(LEAVES)
+    assert set(counts) <= set(expected)
+    for coordinates, probability in expected.items():
+        assert abs(counts[coordinates] / n_samples - probability) < 0.005
+
+
+def test_sobol_sample_matches_leaf_weights_with_fewer_samples():
+    n_samples = 4096
+    points = make_points("sobol", 3, np.random.default_rng(0))
+    samples = Tree(LEAVES).sample(n_samples, points=points)
+
+    counts = Counter(map(tuple, samples.tolist()))
+    expected = _exact_probabilities(LEAVES)
+    assert set(counts) <= set(expected)
+    for coordinates, probability in expected.items():
+        assert abs(counts[coordinates] / n_samples - probability) < 0.002
+
+
+def test_sample_handles_multiplicities_beyond_integer_width():
+    leaves = LeafList(
+        [
+            Leaf(multiplicity=5000, sides=[Side(0, 1)]),
+            Leaf(multiplicity=5001, sides=[Side(2, 0)]),
+            Leaf(multiplicity=0, sides=[Side(3, 0)]),
+        ]
+    )
+    n_samples = 100000
+    tree = Tree(leaves)
+    samples = tree.sample(n_samples, rng=np.random.default_rng(0))
+
+    assert tree.cumulative_weights.dtype == np.float64
+    counts = np.bincount(samples[:, 0], minlength=4) / n_samples
+    assert np.allclose(counts, [0.25, 0.25, 0.5, 0.0], atol=0.01)
+    assert tree.n_blocks == (1 << 5002) + 1
+
+
+def test_iter_samples_matches_a_single_draw():
+    tree = Tree(LEAVES)
+    for strategy in ["iid", "sobol"]:
+        points = make_points(strategy, 3, np.random.default_rng(0))
+        chunks = list(tree.iter_samples(1000, chunk_size=300, points=points))
+        assert [len(chunk) for chunk in chunks] == [300, 300, 300, 100]
+
+        points = make_points(strategy, 3, np.random.default_rng(0))
+        assert np.array_equal(np.concatenate(chunks), tree.sample(1000, points=points))